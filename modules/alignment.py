@@ -0,0 +1,679 @@
+""" Integer alignment kernels used to compute word level metrics.
+
+Words are compared as integer ids and the Levenshtein costs are kept in int32 rows, while the operation chosen for
+each cell is stored in a compact int8 backpointer matrix. The result of an alignment is an edit script: an int8 array
+of operation codes ordered from the first to the last aligned word.
+
+"""
+
+import sqlite3
+import time
+import numpy as np
+from typing import Iterable, Optional
+
+
+_UNREACHABLE_COST = np.int32(2 ** 30)
+# A band covering a larger part of the matrix is not cheaper to fill than the matrix itself
+_MAXIMUM_BAND_FRACTION = 0.5
+
+
+class EditOperation:
+    """ Integer codes of the edit operations. Values match modules.metrics.LevenshteinOperation.Type. """
+
+    CORRECT = 0
+    INSERTION = 1
+    DELETION = 2
+    SUBSTITUTION = 3
+
+
+class EditPenalty:
+    """ Cost of the edit operations, according to SCTK weights. """
+
+    CORRECT = 0
+    INSERTION = 1
+    DELETION = 1
+    SUBSTITUTION = 2
+
+
+class Vocabulary:
+    """ Interner that maps every word seen during a run to a dense integer id.
+
+    The same instance can be shared between the metrics of different services, so that references and hypotheses of
+    the whole corpus are mapped to the same ids. The empty word, used for missing reference or hypothesis words, always
+    has id 0.
+
+    """
+
+    EMPTY_WORD_ID = 0
+
+    def __init__(self):
+        self._ids = {'': self.EMPTY_WORD_ID}
+        self._words = ['']
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    @property
+    def words(self) -> [str]:
+        """ The interned words, ordered by id. """
+
+        return list(self._words)
+
+    def intern(self, word: str) -> int:
+        """ Returns the id of a word, assigning a new one if the word was never seen before. """
+
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = self._ids[word] = len(self._words)
+            self._words.append(word)
+        return word_id
+
+    def intern_words(self, words: Iterable[str], count: int = -1) -> np.ndarray:
+        """ Returns the int32 array of ids of a sequence of words. """
+
+        return np.fromiter((self.intern(word) for word in words), dtype=np.int32, count=count)
+
+    def word(self, word_id: int) -> str:
+        """ Returns the word that was assigned to an id. """
+
+        return self._words[word_id]
+
+
+class AlignmentCache:
+    """Persistent cache of edit scripts stored in a SQLite database and addressed by content keys.
+
+    New entries and the keys of the entries read are kept in memory until flush is called, which writes them in a
+    single transaction and evicts the least recently used entries exceeding the maximum number of entries. The
+    database connection is not shared with the worker processes: each of them opens its own.
+
+    """
+
+    def __init__(self, database_path: str, maximum_entries: int):
+        self._database_path = database_path
+        self._maximum_entries = maximum_entries
+        self._connection = None
+        self._pending_entries = dict()
+        self._used_keys = set()
+        self._hits = 0
+        self._misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    @property
+    def hits(self) -> int:
+        """ Number of edit scripts found in the cache. """
+
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """ Number of edit scripts not found in the cache. """
+
+        return self._misses
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """ Returns the edit script stored with a key, None if it is not in the cache. """
+
+        edit_script = self._pending_entries.get(key)
+        if edit_script is None:
+            entry = self._get_connection().execute('SELECT edit_script FROM alignments WHERE key = ?',
+                                                   (key,)).fetchone()
+            if entry is not None:
+                edit_script = np.frombuffer(entry[0], dtype=np.int8)
+                self._used_keys.add(key)
+        if edit_script is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return edit_script
+
+    def put(self, key: bytes, edit_script: np.ndarray) -> None:
+        """ Stores an edit script with a key. It is written to the database on the next flush. """
+
+        self._pending_entries[key] = edit_script
+
+    def flush(self) -> None:
+        """ Writes the pending entries to the database and evicts the least recently used ones. """
+
+        if not self._pending_entries and not self._used_keys:
+            return
+        connection = self._get_connection()
+        access_time = time.time()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO alignments (key, edit_script, last_used) VALUES (?, ?, ?)',
+                                   ((key, edit_script.astype(np.int8).tobytes(), access_time)
+                                    for key, edit_script in self._pending_entries.items()))
+            connection.executemany('UPDATE alignments SET last_used = ? WHERE key = ?',
+                                   ((access_time, key) for key in self._used_keys))
+            entries_count = connection.execute('SELECT COUNT(*) FROM alignments').fetchone()[0]
+            if entries_count > self._maximum_entries:
+                connection.execute('DELETE FROM alignments WHERE key IN '
+                                   '(SELECT key FROM alignments ORDER BY last_used LIMIT ?)',
+                                   (entries_count - self._maximum_entries,))
+        self._pending_entries.clear()
+        self._used_keys.clear()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """ Opens the database connection on first use, creating the alignments table if needed. """
+
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._database_path, timeout=60)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS alignments '
+                                     '(key BLOB PRIMARY KEY, edit_script BLOB NOT NULL, last_used REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS alignments_last_used ON alignments (last_used)')
+        return self._connection
+
+
+def align(reference_ids: np.ndarray, hypothesis_ids: np.ndarray) -> np.ndarray:
+    """ Aligns two sequences of word ids filling the whole backpointer matrix and returns the edit script. """
+
+    backpointers, _ = compile_backpointers(reference_ids, hypothesis_ids)
+    return backtrace_backpointers(backpointers)
+
+
+def align_batch(reference_ids_batch: [np.ndarray], hypothesis_ids_batch: [np.ndarray]) -> [np.ndarray]:
+    """Aligns a batch of pairs of word id sequences at once.
+
+    Sequences are padded into a 3-D block of costs and backpointers which is filled one anti-diagonal at a time: all
+    the cells of an anti-diagonal depend only on the two previous ones, so each step is vectorized over the cells of
+    the anti-diagonal and over the pairs of the batch. The backtrace is then performed for all the pairs together.
+    Each pair gets the same edit script that align returns.
+
+    Args:
+        reference_ids_batch ([np.ndarray]):
+            The reference word ids of each pair.
+        hypothesis_ids_batch ([np.ndarray]):
+            The hypothesis word ids of each pair.
+
+    Returns:
+        [np.ndarray]:
+            The int8 edit script of each pair.
+
+    """
+
+    batch_size = len(reference_ids_batch)
+    reference_lens = np.fromiter((len(ids) for ids in reference_ids_batch), dtype=np.int64, count=batch_size)
+    hypothesis_lens = np.fromiter((len(ids) for ids in hypothesis_ids_batch), dtype=np.int64, count=batch_size)
+    reference_len = int(reference_lens.max(initial=0))
+    hypothesis_len = int(hypothesis_lens.max(initial=0))
+    # Padding ids never match, anyway padded cells never influence the cells of the shorter pairs
+    references = np.full((batch_size, reference_len), -1, dtype=np.int32)
+    hypotheses = np.full((batch_size, hypothesis_len), -2, dtype=np.int32)
+    for index in range(batch_size):
+        references[index, :reference_lens[index]] = reference_ids_batch[index]
+        hypotheses[index, :hypothesis_lens[index]] = hypothesis_ids_batch[index]
+    costs = np.empty((batch_size, reference_len + 1, hypothesis_len + 1), dtype=np.int32)
+    costs[:, 0, :] = np.arange(hypothesis_len + 1) * EditPenalty.INSERTION
+    costs[:, :, 0] = np.arange(reference_len + 1) * EditPenalty.DELETION
+    backpointers = np.empty(costs.shape, dtype=np.int8)
+    backpointers[:, 0, 0] = EditOperation.CORRECT
+    backpointers[:, 0, 1:] = EditOperation.INSERTION
+    backpointers[:, 1:, 0] = EditOperation.DELETION
+    for anti_diagonal in range(2, reference_len + hypothesis_len + 1):
+        rows = np.arange(max(1, anti_diagonal - hypothesis_len), min(reference_len, anti_diagonal - 1) + 1)
+        columns = anti_diagonal - rows
+        matches = references[:, rows - 1] == hypotheses[:, columns - 1]
+        diagonal_costs = costs[:, rows - 1, columns - 1]
+        upper_costs = costs[:, rows - 1, columns]
+        left_costs = costs[:, rows, columns - 1]
+        cell_costs = np.where(matches, diagonal_costs,
+                              np.minimum(np.minimum(diagonal_costs + EditPenalty.SUBSTITUTION,
+                                                    upper_costs + EditPenalty.DELETION),
+                                         left_costs + EditPenalty.INSERTION))
+        costs[:, rows, columns] = cell_costs
+        backpointers[:, rows, columns] = _select_operations(matches, cell_costs, left_costs, upper_costs)
+    # Backtrace all the pairs together, from their last cell back to the origin
+    pairs = np.arange(batch_size)
+    rows = reference_lens.copy()
+    columns = hypothesis_lens.copy()
+    reversed_edit_scripts = np.empty((batch_size, reference_len + hypothesis_len), dtype=np.int8)
+    edit_scripts_lens = np.zeros(batch_size, dtype=np.int64)
+    for step in range(reference_len + hypothesis_len):
+        active_pairs = (rows > 0) | (columns > 0)
+        if not active_pairs.any():
+            break
+        operations = backpointers[pairs, rows, columns]
+        reversed_edit_scripts[active_pairs, step] = operations[active_pairs]
+        edit_scripts_lens += active_pairs
+        rows -= active_pairs & (operations != EditOperation.INSERTION)
+        columns -= active_pairs & (operations != EditOperation.DELETION)
+    return list(reversed_edit_scripts[index, edit_scripts_lens[index] - 1::-1] if edit_scripts_lens[index] else
+                np.empty(0, dtype=np.int8) for index in range(batch_size))
+
+
+def align_banded(reference_ids: np.ndarray, hypothesis_ids: np.ndarray, band_starts: np.ndarray,
+                 band_ends: np.ndarray) -> Optional[np.ndarray]:
+    """Aligns two sequences of word ids evaluating only the cells inside a band of the backpointer matrix.
+
+    The band is exact when every cell outside of it has a cost lower bound greater than the cost of the banded
+    alignment: in that case no optimal path can leave the band and the edit script is the same that align returns.
+    Otherwise the banded cost is an upper bound of the optimal cost, and the band is widened once to the cells whose
+    lower bound doesn't exceed it, which contain every optimal path.
+
+    Args:
+        reference_ids (np.ndarray):
+            The reference word ids.
+        hypothesis_ids (np.ndarray):
+            The hypothesis word ids.
+        band_starts (np.ndarray):
+            The first column of the band for each of the n+1 rows.
+        band_ends (np.ndarray):
+            The last column of the band for each of the n+1 rows.
+
+    Returns:
+        np.ndarray:
+            The int8 edit script or None if the band containing every optimal path covers most of the matrix, which
+            is then cheaper to fill whole.
+
+    """
+
+    reference_len = len(reference_ids)
+    hypothesis_len = len(hypothesis_ids)
+    compiled_band = compile_banded_backpointers(reference_ids, hypothesis_ids, band_starts, band_ends)
+    if compiled_band is None:
+        # The band doesn't reach the last cell: aligning the words position by position gives the cost bound
+        cost = _get_diagonal_cost(reference_ids, hypothesis_ids)
+    else:
+        backpointers, row_offsets, cost = compiled_band
+        if _is_band_exact(reference_len, hypothesis_len, band_starts, band_ends, cost):
+            return backtrace_banded_backpointers(backpointers, row_offsets, band_starts)
+    band_starts, band_ends = _get_cost_band(reference_len, hypothesis_len, cost)
+    if np.sum(band_ends - band_starts + 1) > _MAXIMUM_BAND_FRACTION * (reference_len + 1) * (hypothesis_len + 1):
+        return None
+    backpointers, row_offsets, _ = compile_banded_backpointers(reference_ids, hypothesis_ids, band_starts, band_ends)
+    return backtrace_banded_backpointers(backpointers, row_offsets, band_starts)
+
+
+def align_linear_space(reference_ids: np.ndarray, hypothesis_ids: np.ndarray, maximum_cells: int) -> np.ndarray:
+    """Aligns two sequences of word ids in linear space, dividing the matrix until its parts have few enough cells.
+
+    At each step the forward costs are computed down to the last row while tracking, for the cells below the middle
+    row, the column where the backtrace starting from them reaches the middle row. The backtrace from the last cell
+    crosses the middle row in that column, so the two parts above and below the crossing cell can be aligned
+    independently and their edit scripts joined: the result is the same edit script that align returns.
+
+    Args:
+        reference_ids (np.ndarray):
+            The reference word ids.
+        hypothesis_ids (np.ndarray):
+            The hypothesis word ids.
+        maximum_cells (int):
+            The maximum number of cells of a part that is aligned filling its whole backpointer matrix.
+
+    Returns:
+        np.ndarray:
+            The int8 edit script.
+
+    """
+
+    reference_len = len(reference_ids)
+    if reference_len < 2 or reference_len * len(hypothesis_ids) <= maximum_cells:
+        return align(reference_ids, hypothesis_ids)
+    middle_row = reference_len // 2
+    crossing_column = _find_crossing_column(reference_ids, hypothesis_ids, middle_row)
+    upper_edit_script = align_linear_space(reference_ids[:middle_row], hypothesis_ids[:crossing_column],
+                                           maximum_cells)
+    lower_edit_script = align_linear_space(reference_ids[middle_row:], hypothesis_ids[crossing_column:],
+                                           maximum_cells)
+    return np.concatenate((upper_edit_script, lower_edit_script))
+
+
+def count_operations(reference_ids: np.ndarray, hypothesis_ids: np.ndarray) -> np.ndarray:
+    """Counts the operations of the edit script of two sequences of word ids without building it.
+
+    Only the last row of costs is kept, together with the number of substitutions along the path that the backtrace
+    would follow to reach each cell: insertions and deletions are then derived from the cost and the cell position.
+    Identical sequences, empty sequences and the common prefix and suffix of the two sequences are counted directly,
+    since matching words at their ends are always aligned as correct.
+
+    Args:
+        reference_ids (np.ndarray):
+            The reference word ids.
+        hypothesis_ids (np.ndarray):
+            The hypothesis word ids.
+
+    Returns:
+        np.ndarray:
+            The number of operations of each type, indexed by operation code.
+
+    """
+
+    operations_counts = np.zeros(EditOperation.SUBSTITUTION + 1, dtype=np.int64)
+    common_len = min(len(reference_ids), len(hypothesis_ids))
+    mismatches = np.flatnonzero(reference_ids[:common_len] != hypothesis_ids[:common_len])
+    prefix_len = int(mismatches[0]) if len(mismatches) else common_len
+    reversed_mismatches = np.flatnonzero(reference_ids[::-1][:common_len - prefix_len] !=
+                                         hypothesis_ids[::-1][:common_len - prefix_len])
+    suffix_len = int(reversed_mismatches[0]) if len(reversed_mismatches) else common_len - prefix_len
+    operations_counts[EditOperation.CORRECT] = prefix_len + suffix_len
+    reference_ids = reference_ids[prefix_len:len(reference_ids) - suffix_len]
+    hypothesis_ids = hypothesis_ids[prefix_len:len(hypothesis_ids) - suffix_len]
+    reference_len = len(reference_ids)
+    hypothesis_len = len(hypothesis_ids)
+    if reference_len == 0 or hypothesis_len == 0:
+        operations_counts[EditOperation.INSERTION] = hypothesis_len
+        operations_counts[EditOperation.DELETION] = reference_len
+        return operations_counts
+
+    columns = np.arange(hypothesis_len + 1)
+    insertion_offsets = columns.astype(np.int32) * EditPenalty.INSERTION
+    previous_row = insertion_offsets.copy()
+    substitutions = np.zeros(hypothesis_len + 1, dtype=np.int32)
+    for i in range(1, reference_len + 1):
+        previous_row, row_operations = _compute_row(previous_row, reference_ids[i - 1], hypothesis_ids, i,
+                                                    insertion_offsets)
+        # Deletions keep the substitutions of the same column of the previous row, correct words and substitutions
+        # those of the previous column, while insertions take those of the nearest cell on their left that is not
+        # an insertion
+        row_operations = np.concatenate(([EditOperation.DELETION], row_operations))
+        diagonal_substitutions = np.concatenate((substitutions[:1], substitutions[:-1]))
+        substitutions = np.where(row_operations == EditOperation.DELETION, substitutions,
+                                 diagonal_substitutions + (row_operations == EditOperation.SUBSTITUTION))
+        source_columns = np.maximum.accumulate(np.where(row_operations != EditOperation.INSERTION, columns, 0))
+        substitutions = substitutions[source_columns]
+
+    # Along a path cost = ins + del + 2 * sub, while ins - del is the difference between the sequences lengths
+    num_sub = int(substitutions[-1])
+    num_ins = (int(previous_row[-1]) - EditPenalty.SUBSTITUTION * num_sub + hypothesis_len - reference_len) // 2
+    num_del = num_ins - hypothesis_len + reference_len
+    operations_counts[EditOperation.CORRECT] += reference_len - num_sub - num_del
+    operations_counts[EditOperation.INSERTION] = num_ins
+    operations_counts[EditOperation.DELETION] = num_del
+    operations_counts[EditOperation.SUBSTITUTION] = num_sub
+    return operations_counts
+
+
+def diagonal_band(reference_len: int, hypothesis_len: int, band_width: int) -> (np.ndarray, np.ndarray):
+    """ Computes a band of fixed width around the diagonal that joins the first and the last cell of the matrix. """
+
+    rows = np.arange(reference_len + 1, dtype=np.float64)
+    centers = rows * hypothesis_len / reference_len if reference_len else rows
+    band_starts = np.clip(np.floor(centers) - band_width, 0, hypothesis_len).astype(np.int64)
+    band_ends = np.clip(np.ceil(centers) + band_width, 0, hypothesis_len).astype(np.int64)
+    band_starts[0] = 0
+    band_ends[-1] = hypothesis_len
+    return band_starts, band_ends
+
+
+def timestamps_band(hypothesis_times: np.ndarray, reference_len: int, reference_start_time: float,
+                    reference_end_time: float, band_width: int) -> (np.ndarray, np.ndarray):
+    """Computes a band that follows the timestamps of the hypothesis words.
+
+    Each hypothesis word is projected on the reference assuming a constant speech rate over the reference time span,
+    then every row of the band includes the columns whose projected position is at most band_width words away.
+
+    Args:
+        hypothesis_times (np.ndarray):
+            The time of each hypothesis word.
+        reference_len (int):
+            The number of reference words.
+        reference_start_time (float):
+            The start time of the reference.
+        reference_end_time (float):
+            The end time of the reference.
+        band_width (int):
+            The maximum distance in words between a cell and the projected position of its hypothesis word.
+
+    Returns:
+        (np.ndarray, np.ndarray):
+            The first and the last column of the band for each row.
+
+    """
+
+    reference_duration = reference_end_time - reference_start_time
+    projected_positions = (hypothesis_times - reference_start_time) * reference_len / reference_duration + 1
+    projected_positions = np.maximum.accumulate(np.clip(projected_positions, 0, reference_len))
+    column_positions = np.concatenate(([0.0], projected_positions))
+    rows = np.arange(reference_len + 1)
+    band_starts = np.searchsorted(column_positions, rows - band_width, side='left')
+    band_ends = np.searchsorted(column_positions, rows + band_width, side='right') - 1
+    band_starts[0] = 0
+    band_ends[-1] = len(hypothesis_times)
+    return band_starts, band_ends
+
+
+def compile_backpointers(reference_ids: np.ndarray, hypothesis_ids: np.ndarray) -> (np.ndarray, int):
+    """Fills the Levenshtein backpointer matrix of two sequences of word ids.
+
+    Costs are computed one row at a time: the insertion dependency inside a row is resolved with a running minimum,
+    so that each row is evaluated with a constant number of vectorized operations. When costs are equal insertions
+    are preferred to deletions and deletions to substitutions, while matching words are always aligned as correct.
+
+    Args:
+        reference_ids (np.ndarray):
+            The reference word ids.
+        hypothesis_ids (np.ndarray):
+            The hypothesis word ids.
+
+    Returns:
+        (np.ndarray, int):
+            The (n+1)x(m+1) int8 backpointer matrix and the total alignment cost.
+
+    """
+
+    reference_len = len(reference_ids)
+    hypothesis_len = len(hypothesis_ids)
+    backpointers = np.empty((reference_len + 1, hypothesis_len + 1), dtype=np.int8)
+    backpointers[0, 0] = EditOperation.CORRECT
+    backpointers[0, 1:] = EditOperation.INSERTION
+    backpointers[1:, 0] = EditOperation.DELETION
+    insertion_offsets = np.arange(hypothesis_len + 1, dtype=np.int32) * EditPenalty.INSERTION
+    previous_row = insertion_offsets.copy()
+    for i in range(1, reference_len + 1):
+        previous_row, backpointers[i, 1:] = _compute_row(previous_row, reference_ids[i - 1], hypothesis_ids, i,
+                                                         insertion_offsets)
+    return backpointers, int(previous_row[-1])
+
+
+def backtrace_backpointers(backpointers: np.ndarray) -> np.ndarray:
+    """Walks a backpointer matrix from the last cell back to the origin.
+
+    Args:
+        backpointers (np.ndarray):
+            The backpointer matrix returned by compile_backpointers.
+
+    Returns:
+        np.ndarray:
+            The int8 edit script, ordered from the first to the last aligned word.
+
+    """
+
+    i = backpointers.shape[0] - 1
+    j = backpointers.shape[1] - 1
+    edit_script = list()
+    while i > 0 or j > 0:
+        operation = backpointers[i, j]
+        edit_script.append(operation)
+        if operation == EditOperation.INSERTION:
+            j -= 1
+        elif operation == EditOperation.DELETION:
+            i -= 1
+        else:
+            i -= 1
+            j -= 1
+    return np.array(edit_script[::-1], dtype=np.int8)
+
+
+def compile_banded_backpointers(reference_ids: np.ndarray, hypothesis_ids: np.ndarray, band_starts: np.ndarray,
+                                band_ends: np.ndarray) -> (np.ndarray, np.ndarray, int):
+    """Fills the cells of a band of the Levenshtein backpointer matrix.
+
+    Rows of the band are stored one after the other in a flat int8 array, so memory grows with the band area instead
+    of the matrix area. Cells outside the band are considered unreachable.
+
+    Args:
+        reference_ids (np.ndarray):
+            The reference word ids.
+        hypothesis_ids (np.ndarray):
+            The hypothesis word ids.
+        band_starts (np.ndarray):
+            The first column of the band for each of the n+1 rows.
+        band_ends (np.ndarray):
+            The last column of the band for each of the n+1 rows.
+
+    Returns:
+        (np.ndarray, np.ndarray, int):
+            The flat backpointers, the offset of each row inside them and the total alignment cost or None if the last
+            cell can't be reached from the first one inside the band.
+
+    """
+
+    reference_len = len(reference_ids)
+    hypothesis_len = len(hypothesis_ids)
+    band_widths = band_ends - band_starts + 1
+    if band_starts[0] != 0 or band_ends[-1] != hypothesis_len or np.any(band_widths <= 0):
+        return None
+    row_offsets = np.concatenate(([0], np.cumsum(band_widths)))
+    backpointers = np.empty(row_offsets[-1], dtype=np.int8)
+    backpointers[0] = EditOperation.CORRECT
+    backpointers[1:row_offsets[1]] = EditOperation.INSERTION
+    # The costs of the previous and of the current row are kept at the index following their column, so that the
+    # upper, diagonal and left neighbours of a band row are slices. Cells outside the bands are unreachable
+    rows_costs = np.full((2, hypothesis_len + 2), _UNREACHABLE_COST, dtype=np.int32)
+    insertion_offsets = np.arange(band_widths.max(), dtype=np.int32) * EditPenalty.INSERTION
+    rows_costs[0, 1:band_widths[0] + 1] = insertion_offsets[:band_widths[0]]
+    for i in range(1, reference_len + 1):
+        band_start = band_starts[i]
+        band_end = band_ends[i]
+        previous_row = rows_costs[(i - 1) % 2]
+        current_row = rows_costs[i % 2]
+        if i > 1:
+            current_row[band_starts[i - 2] + 1:band_ends[i - 2] + 2] = _UNREACHABLE_COST
+        upper_costs = previous_row[band_start + 1:band_end + 2]
+        diagonal_costs = previous_row[band_start:band_end + 1]
+        matches = np.zeros(band_widths[i], dtype=bool)
+        if band_start == 0:
+            matches[1:] = hypothesis_ids[:band_end] == reference_ids[i - 1]
+        else:
+            matches[:] = hypothesis_ids[band_start - 1:band_end] == reference_ids[i - 1]
+        band_costs = np.where(matches, diagonal_costs, np.minimum(diagonal_costs + EditPenalty.SUBSTITUTION,
+                                                                  upper_costs + EditPenalty.DELETION))
+        row_insertion_offsets = insertion_offsets[:band_widths[i]]
+        band_costs = np.minimum.accumulate(band_costs - row_insertion_offsets) + row_insertion_offsets
+        np.minimum(band_costs, _UNREACHABLE_COST, out=band_costs)
+        current_row[band_start + 1:band_end + 2] = band_costs
+        row_backpointers = backpointers[row_offsets[i]:row_offsets[i + 1]]
+        row_backpointers[:] = _select_operations(matches, band_costs, current_row[band_start:band_end + 1],
+                                                 upper_costs)
+        if band_start == 0:
+            row_backpointers[0] = EditOperation.DELETION
+    cost = int(rows_costs[reference_len % 2, hypothesis_len + 1])
+    return (backpointers, row_offsets, cost) if cost < _UNREACHABLE_COST else None
+
+
+def backtrace_banded_backpointers(backpointers: np.ndarray, row_offsets: np.ndarray, band_starts: np.ndarray) \
+        -> np.ndarray:
+    """ Walks the flat backpointers of a band from the last cell back to the origin and returns the edit script. """
+
+    row_offsets = row_offsets.tolist()
+    band_starts = band_starts.tolist()
+    i = len(row_offsets) - 2
+    j = row_offsets[-1] - row_offsets[-2] - 1 + band_starts[-1]
+    edit_script = list()
+    while i > 0 or j > 0:
+        operation = backpointers[row_offsets[i] + j - band_starts[i]]
+        edit_script.append(operation)
+        if operation == EditOperation.INSERTION:
+            j -= 1
+        elif operation == EditOperation.DELETION:
+            i -= 1
+        else:
+            i -= 1
+            j -= 1
+    return np.array(edit_script[::-1], dtype=np.int8)
+
+
+def _compute_row(previous_row: np.ndarray, reference_id: int, hypothesis_ids: np.ndarray, row: int,
+                 insertion_offsets: np.ndarray) -> (np.ndarray, np.ndarray):
+    """ Computes the costs of a matrix row from the previous one and the operations of its cells after the first. """
+
+    matches = hypothesis_ids == reference_id
+    current_row = np.empty_like(previous_row)
+    current_row[0] = EditPenalty.DELETION * row
+    current_row[1:] = np.where(matches, previous_row[:-1], np.minimum(previous_row[:-1] + EditPenalty.SUBSTITUTION,
+                                                                      previous_row[1:] + EditPenalty.DELETION))
+    current_row = np.minimum.accumulate(current_row - insertion_offsets) + insertion_offsets
+    return current_row, _select_operations(matches, current_row[1:], current_row[:-1], previous_row[1:])
+
+
+def _find_crossing_column(reference_ids: np.ndarray, hypothesis_ids: np.ndarray, middle_row: int) -> int:
+    """ Finds the column where the backtrace from the last cell of the matrix reaches the middle row. """
+
+    columns = np.arange(len(hypothesis_ids) + 1)
+    insertion_offsets = columns.astype(np.int32) * EditPenalty.INSERTION
+    previous_row = insertion_offsets.copy()
+    crossing_columns = columns
+    for i in range(1, len(reference_ids) + 1):
+        previous_row, row_operations = _compute_row(previous_row, reference_ids[i - 1], hypothesis_ids, i,
+                                                    insertion_offsets)
+        if i > middle_row:
+            # Deletions come from the same column of the previous row, correct words and substitutions from the
+            # previous column, while insertions take the crossing column of the nearest cell on their left that
+            # is not an insertion
+            row_operations = np.concatenate(([EditOperation.DELETION], row_operations))
+            diagonal_crossing_columns = np.concatenate((crossing_columns[:1], crossing_columns[:-1]))
+            crossing_columns = np.where(row_operations == EditOperation.DELETION, crossing_columns,
+                                        diagonal_crossing_columns)
+            source_columns = np.maximum.accumulate(np.where(row_operations != EditOperation.INSERTION, columns, 0))
+            crossing_columns = crossing_columns[source_columns]
+    return int(crossing_columns[-1])
+
+
+def _get_cost_band(reference_len: int, hypothesis_len: int, cost: int) -> (np.ndarray, np.ndarray):
+    """ Computes the band of the cells whose cost lower bound, the one checked by _is_band_exact, is at most cost. """
+
+    # The bound is |d| times the cheapest gap penalty on the diagonals between 0 and d = m - n, and grows by twice
+    # that penalty for each diagonal further away
+    length_difference = hypothesis_len - reference_len
+    gap_penalty = min(EditPenalty.INSERTION, EditPenalty.DELETION)
+    extra_diagonals = max(0, (cost - abs(length_difference) * gap_penalty) // (2 * gap_penalty))
+    rows = np.arange(reference_len + 1, dtype=np.int64)
+    band_starts = np.clip(rows + min(0, length_difference) - extra_diagonals, 0, hypothesis_len)
+    band_ends = np.clip(rows + max(0, length_difference) + extra_diagonals, 0, hypothesis_len)
+    return band_starts, band_ends
+
+
+def _get_diagonal_cost(reference_ids: np.ndarray, hypothesis_ids: np.ndarray) -> int:
+    """ Returns the cost of aligning the words position by position, then deleting or inserting the remaining ones. """
+
+    aligned_len = min(len(reference_ids), len(hypothesis_ids))
+    substitutions = int(np.count_nonzero(reference_ids[:aligned_len] != hypothesis_ids[:aligned_len]))
+    return substitutions * EditPenalty.SUBSTITUTION + (len(reference_ids) - aligned_len) * EditPenalty.DELETION + \
+        (len(hypothesis_ids) - aligned_len) * EditPenalty.INSERTION
+
+
+def _is_band_exact(reference_len: int, hypothesis_len: int, band_starts: np.ndarray, band_ends: np.ndarray,
+                   cost: int) -> bool:
+    """ Checks that every cell outside a band has a cost lower bound greater than the banded alignment cost. """
+
+    # Any path through cell (i, j) needs at least |j - i| operations to reach it and |d - (j - i)| operations to
+    # reach the last cell, where d = m - n: the bound is a convex function of j, minimal for j - i between 0 and d
+    length_difference = hypothesis_len - reference_len
+    rows = np.arange(reference_len + 1)
+    minimum_diagonal = rows + min(0, length_difference)
+    maximum_diagonal = rows + max(0, length_difference)
+    left_rows = band_starts > 0
+    left_columns = np.clip(minimum_diagonal, 0, band_starts - 1)[left_rows]
+    right_rows = band_ends < hypothesis_len
+    right_columns = np.clip(maximum_diagonal, band_ends + 1, hypothesis_len)[right_rows]
+    outside_rows = np.concatenate((rows[left_rows], rows[right_rows]))
+    outside_columns = np.concatenate((left_columns, right_columns))
+    if not len(outside_rows):
+        return True
+    diagonals = outside_columns - outside_rows
+    lower_bounds = (np.abs(diagonals) + np.abs(length_difference - diagonals)) * min(EditPenalty.INSERTION,
+                                                                                     EditPenalty.DELETION)
+    return bool(np.min(lower_bounds) > cost)
+
+
+def _select_operations(matches: np.ndarray, costs: np.ndarray, left_costs: np.ndarray, upper_costs: np.ndarray) \
+        -> np.ndarray:
+    """ Chooses the operation of a row of cells given their costs and the costs of their neighbours. """
+
+    return np.where(matches, EditOperation.CORRECT,
+                    np.where(costs == left_costs + EditPenalty.INSERTION, EditOperation.INSERTION,
+                             np.where(costs == upper_costs + EditPenalty.DELETION, EditOperation.DELETION,
+                                      EditOperation.SUBSTITUTION)))
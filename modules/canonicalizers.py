@@ -2,14 +2,14 @@
 
 import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any, cast, Mapping
+from typing import Dict, Any, Iterable, cast, Mapping
 from pathlib import Path
 from google.cloud.speech_v1p1beta1 import RecognizeResponse
 from google.protobuf import json_format
 from modules import utilities, tei
 from modules.compiled.canonical_transcription_pb2 import *
 from modules.constants import Paths, ConfigSections
-from modules.tokenizer import DefaultCanonicalTokenizer, TEICanonicalTokenizer
+from modules.tokenizer import CanonicalTokenizerRegistry, DefaultCanonicalTokenizer, TEICanonicalTokenizer
 
 
 class Canonicalizer(ABC):
@@ -21,13 +21,16 @@ class Canonicalizer(ABC):
         self._config = utilities.load_configuration_section(self._get_configuration_section())
         self._canonical_transcription = None
         self._current_reference_utterance_index = -1
+        self._current_reference_utterance = None
+        self._tokenizer_registry = CanonicalTokenizerRegistry()
 
     def canonicalize(self) -> None:
         """ TODO - Function DOC """
 
         self._canonical_transcription = CanonicalTranscription()
-        for reference_utterance_index in range(len(self._reference_tei_file.utterances)):
+        for reference_utterance_index, reference_utterance in enumerate(self._get_reference_utterances()):
             self._current_reference_utterance_index = reference_utterance_index
+            self._current_reference_utterance = reference_utterance
             canonical_utterance = CanonicalUtterance()
             canonical_utterance.id = self._get_current_reference_utterance().id
             canonical_utterance.language = self._get_current_reference_utterance().language
@@ -36,6 +39,8 @@ class Canonicalizer(ABC):
             self._post_canonical_utterance_populate()
             self._canonical_transcription.utterances.append(canonical_utterance)
         self._save_canonical_transcription_to_json()
+        tokenization_cache = self._tokenizer_registry.tokenization_cache
+        print('Tokenization cache: {} hits, {} misses'.format(tokenization_cache.hits, tokenization_cache.misses))
 
     def _get_canonical_transcription_output_path(self) -> str:
         """ TODO - Function DOC """
@@ -45,7 +50,7 @@ class Canonicalizer(ABC):
     def _get_current_reference_utterance(self) -> tei.Utterance:
         """ TODO - Function DOC """
 
-        return self._get_reference_utterance(self._current_reference_utterance_index)
+        return self._current_reference_utterance
 
     def _get_next_reference_utterance(self) -> tei.Utterance:
         """ TODO - Function DOC """
@@ -62,6 +67,11 @@ class Canonicalizer(ABC):
 
         return self._reference_tei_file.utterances[reference_utterance_index]
 
+    def _get_reference_utterances(self) -> Iterable[tei.Utterance]:
+        """ Returns the reference utterances to canonicalize, in order. """
+
+        return self._reference_tei_file.utterances
+
     def _is_first_reference_utterance(self) -> bool:
         """ TODO - Function DOC """
 
@@ -301,8 +311,9 @@ class CloudServiceCanonicalizer(Canonicalizer):
         """ TODO - Function DOC """
 
         current_transcription_file_status = self._get_current_transcription_file_status()
-        default_tokenizer = DefaultCanonicalTokenizer(self._get_current_reference_utterance().language,
-                                                      self._tokenizer_configuration)
+        default_tokenizer = self._tokenizer_registry.get_tokenizer(DefaultCanonicalTokenizer,
+                                                                   self._get_current_reference_utterance().language,
+                                                                   self._tokenizer_configuration)
         return default_tokenizer.tokenize(word=current_transcription_file_status.get_current_word_content(),
                                           start_time=current_transcription_file_status.get_current_word_start_time(),
                                           end_time=current_transcription_file_status.get_current_word_end_time())
@@ -327,6 +338,11 @@ class TEIFileCanonicalizer(Canonicalizer):
 
         return ConfigSections.TEI
 
+    def _get_reference_utterances(self) -> Iterable[tei.Utterance]:
+        """ Returns the reference utterances as they are parsed: only the current one is needed. """
+
+        return self._reference_tei_file.iter_utterances()
+
     def _pre_canonical_utterance_populate(self) -> None:
         """ TODO - Function DOC """
 
@@ -340,10 +356,15 @@ class TEIFileCanonicalizer(Canonicalizer):
         canonical_utterance.end_time = current_reference_utterance.end_time
         canonical_utterance.note = current_reference_utterance.note
         canonical_utterance.speaker_id = current_reference_utterance.speaker.id
+        tei_tokenizer = self._tokenizer_registry.get_tokenizer(TEICanonicalTokenizer,
+                                                               current_reference_utterance.language,
+                                                               self._tokenizer_configuration)
+        tei_utterance_words = current_reference_utterance.words
+        tokenized_words = tei_tokenizer.tokenize_batch([tei_utterance_word.word for tei_utterance_word in
+                                                        tei_utterance_words])
         # Populate words
-        for tei_utterance_word in current_reference_utterance.words:
-            tei_tokenizer = TEICanonicalTokenizer(current_reference_utterance.language, self._tokenizer_configuration)
-            canonical_utterance_word = tei_tokenizer.tokenize(word=tei_utterance_word.word)
+        for word_index, tei_utterance_word in enumerate(tei_utterance_words):
+            canonical_utterance_word = tokenized_words.get_tokens(word_index)
             if canonical_utterance_word:
                 # Populate events
                 for tei_utterance_word_event in tei_utterance_word.events:
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: metrics_report.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14metrics_report.proto\x12\x07\x66onti40\"-\n\x0eOperationCount\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\"L\n\x0fOperationsGroup\x12\x0c\n\x04type\x18\x01 \x01(\t\x12+\n\noperations\x18\x02 \x03(\x0b\x32\x17.fonti40.OperationCount\"\xc6\x01\n\x0bTextMetrics\x12\x18\n\x10reference_length\x18\x01 \x01(\x03\x12\x19\n\x11hypothesis_length\x18\x02 \x01(\x03\x12\x0f\n\x07\x63orrect\x18\x03 \x01(\x03\x12\x15\n\rsubstitutions\x18\x04 \x01(\x03\x12\x11\n\tdeletions\x18\x05 \x01(\x03\x12\x12\n\ninsertions\x18\x06 \x01(\x03\x12\x33\n\x11operations_groups\x18\x07 \x03(\x0b\x32\x18.fonti40.OperationsGroup\"F\n\x0f\x45ventTagMetrics\x12\x0c\n\x04name\x18\x01 \x01(\t\x12%\n\x07metrics\x18\x02 \x01(\x0b\x32\x14.fonti40.TextMetrics\"\x9a\x01\n\rGlobalMetrics\x12*\n\x0coverall_text\x18\x01 \x01(\x0b\x32\x14.fonti40.TextMetrics\x12/\n\x11without_tags_text\x18\x02 \x01(\x0b\x32\x14.fonti40.TextMetrics\x12,\n\nevent_tags\x18\x03 \x03(\x0b\x32\x18.fonti40.EventTagMetrics\"m\n\x10UtteranceMetrics\x12\n\n\x02id\x18\x01 \x01(\t\x12\x10\n\x08language\x18\x02 \x01(\t\x12\x12\n\naudio_note\x18\x03 \x01(\t\x12\'\n\x07metrics\x18\x04 \x01(\x0b\x32\x16.fonti40.GlobalMetrics\"B\n\x11UtterancesMetrics\x12-\n\nutterances\x18\x01 \x03(\x0b\x32\x19.fonti40.UtteranceMetrics\"\x85\x02\n\x14MetricsReportSection\x12\x37\n\x04type\x18\x01 \x01(\x0e\x32).fonti40.MetricsReportSection.SectionType\x12\x0c\n\x04\x66ile\x18\x02 \x01(\t\x12\x10\n\x08language\x18\x03 \x01(\t\x12\x12\n\naudio_note\x18\x04 \x01(\t\x12\x0e\n\x06offset\x18\x05 \x01(\x04\x12\x0e\n\x06length\x18\x06 \x01(\x04\"`\n\x0bSectionType\x12\n\n\x06GLOBAL\x10\x00\x12\x0c\n\x08LANGUAGE\x10\x01\x12\x17\n\x13LANGUAGE_AUDIO_NOTE\x10\x02\x12\x0e\n\nAUDIO_NOTE\x10\x03\x12\x0e\n\nUTTERANCES\x10\x04\"T\n\x12MetricsReportIndex\x12/\n\x08sections\x18\x01 \x03(\x0b\x32\x1d.fonti40.MetricsReportSection\x12\r\n\x05\x66iles\x18\x02 \x03(\tb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'metrics_report_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _OPERATIONCOUNT._serialized_start=33
+  _OPERATIONCOUNT._serialized_end=78
+  _OPERATIONSGROUP._serialized_start=80
+  _OPERATIONSGROUP._serialized_end=156
+  _TEXTMETRICS._serialized_start=159
+  _TEXTMETRICS._serialized_end=357
+  _EVENTTAGMETRICS._serialized_start=359
+  _EVENTTAGMETRICS._serialized_end=429
+  _GLOBALMETRICS._serialized_start=432
+  _GLOBALMETRICS._serialized_end=586
+  _UTTERANCEMETRICS._serialized_start=588
+  _UTTERANCEMETRICS._serialized_end=697
+  _UTTERANCESMETRICS._serialized_start=699
+  _UTTERANCESMETRICS._serialized_end=765
+  _METRICSREPORTSECTION._serialized_start=768
+  _METRICSREPORTSECTION._serialized_end=1029
+  _METRICSREPORTSECTION_SECTIONTYPE._serialized_start=933
+  _METRICSREPORTSECTION_SECTIONTYPE._serialized_end=1029
+  _METRICSREPORTINDEX._serialized_start=1031
+  _METRICSREPORTINDEX._serialized_end=1115
+# @@protoc_insertion_point(module_scope)
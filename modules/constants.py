@@ -10,8 +10,10 @@ from pathlib import Path
 class ConfigSections:
     """ Constants that indicate the sections present in the main configuration file. """
     
+    ALIGNMENT = 'Alignment'
     AWS_TRANSCRIBE = 'AWS_Transcribe'
     AWS_COMPEHEND = 'AWS_Comprehend'
+    COMPUTATION = 'Computation'
     EVALUATOR = 'Evaluator'
     GOOGLE_STT = 'Google_STT'
     SPEECHES = 'Speeches'
@@ -19,6 +21,21 @@ class ConfigSections:
     TOKENIZER = 'Tokenizer'
 
 
+class Alignment:
+    """ Constants related to the alignment of references and hypotheses. """
+
+    BAND_MODE = 'band_mode'
+    BAND_WIDTH = 'band_width'
+    BATCH_MAXIMUM_LENGTH = 'batch_maximum_length'
+    BATCH_MINIMUM_UTTERANCES = 'batch_minimum_utterances'
+    BATCH_SIZE = 'batch_size'
+    CACHE_MAXIMUM_ENTRIES = 'cache_maximum_entries'
+    CACHE_PATH = 'cache_path'
+    LINEAR_SPACE_THRESHOLD = 'linear_space_threshold'
+    DIAGONAL_BAND = 'diagonal'
+    TIMESTAMPS_BAND = 'timestamps'
+
+
 class Amazon:
     """ Constants related to the AWS Transcribe service. """
 
@@ -53,6 +70,20 @@ class Amazon:
     INPUT_KEY_PREFIX = 'input_key_prefix'
 
 
+class Computation:
+    """ Constants related to the computation of metrics. """
+
+    OPERATIONS_SKETCH_MAXIMUM_ERROR = 'operations_sketch_maximum_error'
+    OPERATIONS_SKETCH_SIZE = 'operations_sketch_size'
+    RECORDS = 'records'
+    REPORT_FORMAT = 'report_format'
+    STREAMING = 'streaming'
+    TOTALS_ONLY = 'totals_only'
+    WORKERS = 'workers'
+    BINARY_REPORT = 'binary'
+    JSON_REPORT = 'json'
+
+
 class Evaluator:
     """ Constants related to evaluation operations. """
 
@@ -124,6 +155,7 @@ class TEI:
 class Tokenizer:
     """ Constants related to tokenize operations. """
 
+    CACHE_MAXIMUM_ENTRIES = 'cache_maximum_entries'
     LOWERCASE = 'lowercase'
     EXPAND_CONTRACTED_WORDS = 'expand_contracted_words'
     EXPAND_COMPOUND_WORDS = 'expand_compound_words'
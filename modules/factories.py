@@ -6,8 +6,9 @@ import ipywidgets as widgets
 from typing import Mapping, Any
 from IPython.core.display import display
 from modules import tei, utilities
+from modules.alignment import Vocabulary
 from modules.constants import Colors
-from modules.metrics import GoogleSTTMetrics, AWSTranscribeMetrics, MetricsCalculator
+from modules.metrics import GoogleSTTMetrics, AWSTranscribeMetrics, MetricsCube
 from modules.canonicalizers import TEIFileCanonicalizer, GoogleSTTCanonicalizer, \
     AWSTranscribeCanonicalizer
 
@@ -15,6 +16,8 @@ from modules.canonicalizers import TEIFileCanonicalizer, GoogleSTTCanonicalizer,
 class WidgetFactory:
     """ TODO - Class DOC """
 
+    # Operations groups show at most this many of the most frequent operations of a type
+    MAXIMUM_DISPLAYED_OPERATIONS = 50
     computation_configuration = {
         'corpus': {
             'all': {
@@ -120,6 +123,8 @@ class WidgetFactory:
     results_scope = None
     google_stt_metrics = None
     aws_transcribe_metrics = None
+    google_stt_metrics_cube = None
+    aws_transcribe_metrics_cube = None
     result_widget = None
     event_tags_conf_widget = None
     results_conf_widget = None
@@ -157,17 +162,23 @@ class WidgetFactory:
                                            tokenizer_configuration).canonicalize()
                     AWSTranscribeCanonicalizer(aws_transcription_files_path, tei_file,
                                                tokenizer_configuration).canonicalize()
-            # Compute metrics
+            # Compute metrics: both services share the same vocabulary
+            vocabulary = Vocabulary()
             with compute_metrics_output:
                 print('{}Computing Google Speech-to-Text metrics...{}'.format(Colors.OKGREEN, Colors.ENDC))
                 WidgetFactory.google_stt_metrics = GoogleSTTMetrics(paths['tei_canonical_file_paths'],
                                                                     paths['google_canonical_file_paths'],
-                                                                    evaluator_configuration).metrics()
+                                                                    evaluator_configuration,
+                                                                    vocabulary).metrics()
             with compute_metrics_output:
                 print('{}Computing AWS Transcribe metrics...{}'.format(Colors.OKGREEN, Colors.ENDC))
                 WidgetFactory.aws_transcribe_metrics = AWSTranscribeMetrics(paths['tei_canonical_file_paths'],
                                                                             paths['aws_canonical_file_paths'],
-                                                                            evaluator_configuration).metrics()
+                                                                            evaluator_configuration,
+                                                                            vocabulary).metrics()
+            # Pre-aggregate results so that any selection is resolved without walking the metrics
+            WidgetFactory.google_stt_metrics_cube = MetricsCube(WidgetFactory.google_stt_metrics)
+            WidgetFactory.aws_transcribe_metrics_cube = MetricsCube(WidgetFactory.aws_transcribe_metrics)
             # Initialize results configuration
             for key in WidgetFactory.results_configuration.keys():
                 if key != 'event_tags':
@@ -245,46 +256,14 @@ class WidgetFactory:
                           format(Colors.FAIL, Colors.ENDC))
                 return
 
-            # Get result from computed metrics
-            google_results = list()
-            aws_results = list()
-            for file in selected_files:
-                current_google_file = WidgetFactory.google_stt_metrics['files'][file]
-                current_aws_file = WidgetFactory.aws_transcribe_metrics['files'][file]
-                for language in selected_languages:
-                    current_google_file_language = current_google_file['languages'][language]
-                    current_aws_file_language = current_aws_file['languages'][language]
-                    for audio_note in selected_audio_notes:
-                        google_audio_note = current_google_file_language['audio_notes'][audio_note] \
-                            if current_google_file_language else None
-                        aws_audio_note = current_aws_file_language['audio_notes'][audio_note] \
-                            if current_aws_file_language else None
-                        if selected_scope == 'event_tags':
-                            for event_tags in selected_event_tags:
-                                try:
-                                    google_results.append(google_audio_note['event_tags'][event_tags]
-                                                          if google_audio_note else None)
-                                    aws_results.append(aws_audio_note['event_tags'][event_tags]
-                                                       if aws_audio_note else None)
-                                except KeyError:
-                                    continue
-                        else:
-                            try:
-                                google_results.append(google_audio_note[selected_scope] if google_audio_note else None)
-                                aws_results.append(aws_audio_note[selected_scope] if aws_audio_note else None)
-                            except KeyError:
-                                with update_results_output:
-                                    print('{}{} {} {}{}'.format(file, language, audio_note, Colors.FAIL, Colors.ENDC))
-            google_metrics = collections.defaultdict()
-            google_results = list(filter(None, google_results))
-            if google_results:
-                google_metrics.update(MetricsCalculator.compute_totals_metrics(google_results))
-                google_metrics.update(MetricsCalculator.compute_operations_groups(google_results))
-            aws_metrics = collections.defaultdict()
-            aws_results = list(filter(None, aws_results))
-            if aws_results:
-                aws_metrics.update(MetricsCalculator.compute_totals_metrics(aws_results))
-                aws_metrics.update(MetricsCalculator.compute_operations_groups(aws_results))
+            # Get result from pre-aggregated metrics
+            selected_scopes = selected_event_tags if selected_scope == 'event_tags' else [selected_scope]
+            google_metrics = WidgetFactory.google_stt_metrics_cube.compute_metrics(
+                selected_files, selected_languages, selected_audio_notes, selected_scopes,
+                WidgetFactory.MAXIMUM_DISPLAYED_OPERATIONS)
+            aws_metrics = WidgetFactory.aws_transcribe_metrics_cube.compute_metrics(
+                selected_files, selected_languages, selected_audio_notes, selected_scopes,
+                WidgetFactory.MAXIMUM_DISPLAYED_OPERATIONS)
 
             # Update widgets
             google_stt_grid.top_left = WidgetFactory._metrics_widget(google_metrics)
@@ -500,7 +479,8 @@ class WidgetFactory:
                 count_greater_than_dropdown.disabled = False
                 count_greater_than = count_greater_than_dropdown.value
                 selected_operations = list((key, value) for key, value in operations_groups[selected_operation_type]
-                                           .items() if value > count_greater_than)[:50]
+                                           .items() if value > count_greater_than)
+                selected_operations = selected_operations[:WidgetFactory.MAXIMUM_DISPLAYED_OPERATIONS]
             else:
                 count_greater_than_dropdown.disabled = True
                 selected_operation_type = operation_type_dropdown.value
@@ -1,15 +1,23 @@
 """ TODO - Module DOC """
 
 from __future__ import annotations
+import ast
 import collections
+import functools
+import hashlib
+import itertools
 import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Mapping, Any, Iterable
-from modules import utilities
+from typing import Mapping, Any, Callable, Iterable, Iterator, Union
+from modules import alignment, records, utilities
+from modules.compiled import metrics_report_pb2
 from modules.compiled.canonical_transcription_pb2 import CanonicalToken, CanonicalUtterance, CanonicalTokenEvent
-from modules.constants import Paths, ConfigSections
+from modules.constants import Paths, ConfigSections, Alignment, Computation
 from modules.evaluator import DefaultMetricsCanonicalEvaluator
 from modules.tei import TEIFile
 
@@ -85,9 +93,13 @@ class LevenshteinOperation:
 class LevenshteinOperationGroup:
     """ TODO - Class DOC """
 
-    def __init__(self, operations_type: LevenshteinOperation.Type):
+    def __init__(self, operations_type: LevenshteinOperation.Type, vocabulary: alignment.Vocabulary):
         self._operations_type = operations_type
-        self._operations = list()
+        self._vocabulary = vocabulary
+        # Operations are counted by (reference word id, hypothesis word id) and the position of their latest addition
+        # is kept, so that operations with equal counts are collected in alignment order
+        self._operations = dict()
+        self._operations_count = 0
 
     @property
     def operations_type(self):
@@ -95,6 +107,12 @@ class LevenshteinOperationGroup:
 
         return self._operations_type.name
 
+    @property
+    def vocabulary(self) -> alignment.Vocabulary:
+        """ TODO - Function DOC """
+
+        return self._vocabulary
+
     def add(self, operation: LevenshteinOperation) -> None:
         """ TODO - Function DOC """
 
@@ -102,15 +120,22 @@ class LevenshteinOperationGroup:
             raise ValueError('Operation type {} does not match with group operation type {}'.format(
                 operation.type, self._operations_type))
 
-        self._operations.append(operation)
+        operation_key = (self._vocabulary.intern(operation.reference_word.word),
+                         self._vocabulary.intern(operation.hypothesis_word.word))
+        operation_entry = self._operations.get(operation_key)
+        if operation_entry is None:
+            self._operations[operation_key] = [1, self._operations_count]
+        else:
+            operation_entry[0] += 1
+            operation_entry[1] = self._operations_count
+        self._operations_count += 1
 
-    def collect_operations(self) -> [LevenshteinOperation, int]:
+    def collect_operations(self) -> [((int, int), int)]:
         """ TODO - Function DOC """
 
-        transformations = collections.defaultdict(int)
-        for operation in reversed(self._operations):
-            transformations[operation] += 1
-        return list((k, transformations[k]) for k in sorted(transformations, key=transformations.get, reverse=True))
+        # Operations are added from the last aligned word back to the first one
+        collected_operations = sorted(self._operations.items(), key=lambda item: tuple(item[1]), reverse=True)
+        return list((operation_key, count) for operation_key, (count, _) in collected_operations)
 
     @staticmethod
     def operations_groups_to_dict(operations_groups: [LevenshteinOperationGroup]):
@@ -120,55 +145,936 @@ class LevenshteinOperationGroup:
         for operation_group in operations_groups:
             operations_group_dict[operation_group.operations_type] = collections.defaultdict()
             collected_operations = operation_group.collect_operations()
-            for operation, count in collected_operations:
+            vocabulary = operation_group.vocabulary
+            for (reference_word_id, hypothesis_word_id), count in collected_operations:
+                operation_name = '{} ==> {}'.format(vocabulary.word(reference_word_id),
+                                                    vocabulary.word(hypothesis_word_id))
                 operations_group_dict[operation_group.operations_type].update({
-                    repr(operation): count
+                    repr(operation_name): count
                 })
         return operations_group_dict
 
 
+class LevenshteinAlignment:
+    """ Edit script of an utterance alignment together with the words it refers to. """
+
+    def __init__(self, edit_script: np.ndarray, original_reference_words: [CanonicalToken],
+                 filtered_reference_words: [CanonicalToken], hypothesis_words: [CanonicalToken]):
+        self._edit_script = edit_script
+        self._original_reference_words = original_reference_words
+        self._filtered_reference_words = filtered_reference_words
+        self._hypothesis_words = hypothesis_words
+
+    @property
+    def edit_script(self) -> np.ndarray:
+        """ TODO - Function DOC """
+
+        return self._edit_script
+
+    @property
+    def original_reference_words(self) -> [CanonicalToken]:
+        """ TODO - Function DOC """
+
+        return self._original_reference_words
+
+    @property
+    def filtered_reference_words(self) -> [CanonicalToken]:
+        """ TODO - Function DOC """
+
+        return self._filtered_reference_words
+
+    @property
+    def hypothesis_words(self) -> [CanonicalToken]:
+        """ TODO - Function DOC """
+
+        return self._hypothesis_words
+
+
+class ConfusionMatrix:
+    """Sparse matrix of the counts of (reference word, hypothesis word) operations over interned word ids.
+
+    Operations are stored in coordinate form, with the position of their first appearance. Merged matrices are kept
+    as chunks and summed only when the matrix is ranked, i.e. when its operations are sorted by decreasing count with
+    equal counts in order of first appearance. Word ids belong to the vocabulary of the matrix, which is the one of
+    the first operations group or matrix added to it unless given: matrices of the same run share it, while the
+    operations of other vocabularies are mapped to it through their words. A pickled matrix carries only the words of
+    its operations.
+
+    """
+
+    OPERATION_NAME_SEPARATOR = ' ==> '
+    VECTORIZED_MINIMUM_OPERATIONS = 512
+
+    def __init__(self, vocabulary: alignment.Vocabulary = None):
+        self._vocabulary = vocabulary
+        # Operations already summed and ranked: keys, counts and positions of first appearance
+        self._ranked_operations = (list(), list(), list())
+        # Operations appended since the last ranking, in order of appearance
+        self._pending_keys = list()
+        self._pending_counts = list()
+        self._pending_ranked = True
+
+    def __getstate__(self):
+        operations_keys, operations_counts, operations_positions = self._rank()
+        state = self.__dict__.copy()
+        state['_vocabulary'] = alignment.Vocabulary()
+        state['_ranked_operations'] = (self._map_keys(operations_keys, self._vocabulary, state['_vocabulary']),
+                                       list(operations_counts), list(operations_positions))
+        return state
+
+    @property
+    def vocabulary(self) -> alignment.Vocabulary:
+        """ The vocabulary of the word ids of the operations. """
+
+        return self._get_vocabulary()
+
+    @classmethod
+    def from_dict(cls, operations: Mapping[str, int]) -> ConfusionMatrix:
+        """ Builds the matrix of a dictionary of operation names and counts, whose order is the order of appearance. """
+
+        return cls().update(operations)
+
+    def update(self, operations: Mapping[str, int]) -> ConfusionMatrix:
+        """ Adds the counts of a dictionary of operation names and counts, as written in the reports, to this matrix
+        and returns it. """
+
+        vocabulary = self._get_vocabulary()
+        operations_counts = list(operations.values())
+        # Operation names are unique, so the operations are already ranked if their counts are not increasing
+        self._extend_pending(list(self._get_operation_key(vocabulary, operation_name) for operation_name in operations),
+                             operations_counts,
+                             all(count >= next_count for count, next_count in zip(operations_counts,
+                                                                                   operations_counts[1:])))
+        return self
+
+    def update_operations_group(self, operations_group: LevenshteinOperationGroup) -> ConfusionMatrix:
+        """ Adds the counts of an operations group to this matrix and returns it. Its (reference word id, hypothesis
+        word id) keys are used as they are when the group shares the vocabulary of this matrix. """
+
+        if self._vocabulary is None:
+            self._vocabulary = operations_group.vocabulary
+        collected_operations = operations_group.collect_operations()
+        operations_keys = list(reference_word_id << 32 | hypothesis_word_id
+                               for (reference_word_id, hypothesis_word_id), _ in collected_operations)
+        # Collected operations are already ranked
+        self._extend_pending(self._map_keys(operations_keys, operations_group.vocabulary, self._vocabulary),
+                             list(count for _, count in collected_operations), True)
+        return self
+
+    def merge(self, other: ConfusionMatrix) -> ConfusionMatrix:
+        """ Adds the counts of another matrix to this one and returns it. Its operations appear in ranked order. """
+
+        other_keys, other_counts, _ = other._rank()
+        if self._vocabulary is None:
+            self._vocabulary = other._vocabulary
+        self._extend_pending(self._map_keys(other_keys, other._vocabulary, self._vocabulary), other_counts, True)
+        return self
+
+    def to_coo(self) -> (np.ndarray, np.ndarray, np.ndarray):
+        """ Returns the reference word ids, hypothesis word ids and counts of the operations, in ranked order. """
+
+        operations_keys, operations_counts, _ = self._rank()
+        operations_keys = np.array(operations_keys, dtype=np.int64)
+        return (operations_keys >> 32).astype(np.int32), (operations_keys & 0xFFFFFFFF).astype(np.int32), \
+            np.array(operations_counts, dtype=np.int64)
+
+    def to_dict(self) -> Mapping[str, int]:
+        """ Returns the operation names and counts, in ranked order. """
+
+        operations_keys, operations_counts, _ = self._rank()
+        vocabulary = self._get_vocabulary()
+        return {repr('{}{}{}'.format(vocabulary.word(operation_key >> 32), self.OPERATION_NAME_SEPARATOR,
+                                     vocabulary.word(operation_key & 0xFFFFFFFF))): count
+                for operation_key, count in zip(operations_keys, operations_counts)}
+
+    def _extend_pending(self, operations_keys: [int], operations_counts: [int], operations_ranked: bool) -> None:
+        """ Appends operations to the pending ones. """
+
+        # Ranked operations added to an empty matrix are still ranked
+        self._pending_ranked = not self._ranked_operations[0] and not self._pending_keys and operations_ranked
+        self._pending_keys.extend(operations_keys)
+        self._pending_counts.extend(operations_counts)
+
+    def _get_vocabulary(self) -> alignment.Vocabulary:
+        """ Returns the vocabulary of the matrix, creating it if no operations were added yet. """
+
+        if self._vocabulary is None:
+            self._vocabulary = alignment.Vocabulary()
+        return self._vocabulary
+
+    def _rank(self) -> ([int], [int], [int]):
+        """ Sums the counts of the pending operations into the ranked ones and sorts them by decreasing count. """
+        if not self._pending_keys:
+            return self._ranked_operations
+        ranked_keys, ranked_counts, ranked_positions = self._ranked_operations
+        # Pending operations appear after all the ranked ones
+        pending_start = max(ranked_positions) + 1 if ranked_positions else 0
+        pending_positions = range(pending_start, pending_start + len(self._pending_keys))
+        if not ranked_keys and self._pending_ranked:
+            self._ranked_operations = (self._pending_keys, self._pending_counts, list(pending_positions))
+        elif len(ranked_keys) + len(self._pending_keys) < self.VECTORIZED_MINIMUM_OPERATIONS:
+            # Small matrices are summed with a dictionary, avoiding the overhead of array operations
+            operations = dict()
+            for operation_key, count, position in zip(ranked_keys + self._pending_keys,
+                                                      ranked_counts + self._pending_counts,
+                                                      ranked_positions + list(pending_positions)):
+                operation_entry = operations.get(operation_key)
+                if operation_entry is None:
+                    operations[operation_key] = [count, position]
+                else:
+                    operation_entry[0] += count
+                    operation_entry[1] = min(operation_entry[1], position)
+            ranked_items = sorted(operations.items(), key=lambda item: (-item[1][0], item[1][1]))
+            self._ranked_operations = (list(operation_key for operation_key, _ in ranked_items),
+                                       list(count for _, (count, _) in ranked_items),
+                                       list(position for _, (_, position) in ranked_items))
+        else:
+            all_keys = np.array(ranked_keys + self._pending_keys, dtype=np.int64)
+            all_counts = np.array(ranked_counts + self._pending_counts, dtype=np.int64)
+            all_positions = np.array(ranked_positions + list(pending_positions), dtype=np.int64)
+            operations_keys, operations_indexes = np.unique(all_keys, return_inverse=True)
+            operations_indexes = operations_indexes.reshape(-1)
+            operations_counts = np.zeros(len(operations_keys), dtype=np.int64)
+            np.add.at(operations_counts, operations_indexes, all_counts)
+            first_positions = np.full(len(operations_keys), np.iinfo(np.int64).max, dtype=np.int64)
+            np.minimum.at(first_positions, operations_indexes, all_positions)
+            ranked_order = np.lexsort((first_positions, -operations_counts))
+            self._ranked_operations = (operations_keys[ranked_order].tolist(), operations_counts[ranked_order].tolist(),
+                                       first_positions[ranked_order].tolist())
+        self._pending_keys = list()
+        self._pending_counts = list()
+        self._pending_ranked = True
+        return self._ranked_operations
+
+    @classmethod
+    def _get_operation_key(cls, vocabulary: alignment.Vocabulary, operation_name: str) -> int:
+        """ Returns the key of an operation name: the reference word id in the high 32 bits and the hypothesis one in
+        the low 32 bits. """
+
+        reference_word, hypothesis_word = ast.literal_eval(operation_name).split(cls.OPERATION_NAME_SEPARATOR, 1)
+        return vocabulary.intern(reference_word) << 32 | vocabulary.intern(hypothesis_word)
+
+    @staticmethod
+    def _map_keys(operations_keys: [int], source_vocabulary: alignment.Vocabulary,
+                  target_vocabulary: alignment.Vocabulary) -> [int]:
+        """ Maps operation keys from a vocabulary to another one through their words. """
+
+        if source_vocabulary is target_vocabulary:
+            return operations_keys
+        word_ids = dict()
+        mapped_keys = list()
+        for operation_key in operations_keys:
+            for word_id in (operation_key >> 32, operation_key & 0xFFFFFFFF):
+                if word_id not in word_ids:
+                    word_ids[word_id] = target_vocabulary.intern(source_vocabulary.word(word_id))
+            mapped_keys.append(word_ids[operation_key >> 32] << 32 | word_ids[operation_key & 0xFFFFFFFF])
+        return mapped_keys
+
+
+class HeavyHittersSketch:
+    """Mergeable Space-Saving sketch of the most frequent operations of a type.
+
+    At most `capacity` operations are counted. When a merge exceeds it, only the operations with the highest counts
+    are kept, and the counts of the operations missing from a full sketch are estimated with its minimum count. Counts
+    are therefore never underestimated and exceed the exact ones by at most the error bound, which is the minimum
+    count of a truncated sketch and never more than the total count divided by the capacity. A sketch that never
+    dropped an operation, itself or through the sketches merged into it, is exact and ranked like a ConfusionMatrix.
+
+    """
+
+    def __init__(self, capacity: int, maximum_error: float = 0.0):
+        # An error bound relative to the total count requires at least its inverse counters
+        self._capacity = max(capacity, math.ceil(1 / maximum_error) if maximum_error > 0 else 0)
+        if self._capacity <= 0:
+            raise ValueError('Heavy hitters sketches need a positive capacity or maximum error.')
+        # Operation names and counts, in order of first appearance
+        self._counters = dict()
+        # Whether operations were dropped, making the counts estimates
+        self._truncated = False
+
+    @property
+    def capacity(self) -> int:
+        """ The maximum number of operations counted by the sketch. """
+
+        return self._capacity
+
+    @property
+    def error_bound(self) -> int:
+        """ The maximum overestimation of the counts of the sketch. """
+
+        return min(self._counters.values()) if self._truncated else 0
+
+    @property
+    def truncated(self) -> bool:
+        """ Whether operations were dropped from the sketch, so that its counts are estimates. """
+
+        return self._truncated
+
+    def update(self, operations: Mapping[str, int]) -> HeavyHittersSketch:
+        """ Adds the exact counts of a dictionary of operation names and counts to this sketch and returns it. """
+
+        return self._merge_counters(self._rank_counters(operations), 0, False)
+
+    def update_operations_group(self, operations_group: LevenshteinOperationGroup) -> HeavyHittersSketch:
+        """ Adds the counts of an operations group to this sketch and returns it. """
+
+        return self.update(LevenshteinOperationGroup.operations_groups_to_dict([operations_group])[
+            operations_group.operations_type])
+
+    def merge(self, other: HeavyHittersSketch) -> HeavyHittersSketch:
+        """ Adds the counts of another sketch to this one and returns it. Its operations appear in ranked order. """
+
+        return self._merge_counters(self._rank_counters(other._counters), other.error_bound, other._truncated)
+
+    def to_dict(self) -> Mapping[str, int]:
+        """ Returns the operation names and estimated counts, in ranked order. """
+
+        return dict(self._rank_counters(self._counters))
+
+    def _merge_counters(self, ranked_counters: [(str, int)], minimum_count: int,
+                        truncated: bool) -> HeavyHittersSketch:
+        """ Adds ranked operation names and counts, whose missing operations count at most minimum_count when they
+        come from a truncated sketch. """
+
+        self_minimum_count = self.error_bound
+        merged_counters = dict()
+        for operation_name, count in self._counters.items():
+            merged_counters[operation_name] = count + minimum_count
+        for operation_name, count in ranked_counters:
+            if operation_name in merged_counters:
+                merged_counters[operation_name] += count - minimum_count
+            else:
+                merged_counters[operation_name] = count + self_minimum_count
+        self._truncated = self._truncated or truncated or len(merged_counters) > self._capacity
+        if len(merged_counters) > self._capacity:
+            kept_operations = set(operation_name for operation_name, _ in
+                                  self._rank_counters(merged_counters)[:self._capacity])
+            merged_counters = {operation_name: count for operation_name, count in merged_counters.items()
+                               if operation_name in kept_operations}
+        self._counters = merged_counters
+        return self
+
+    @staticmethod
+    def _rank_counters(counters: Mapping[str, int]) -> [(str, int)]:
+        """ Sorts operation names and counts by decreasing count, with equal counts in order of appearance. """
+
+        return sorted(counters.items(), key=lambda counter: -counter[1])
+
+
+OperationsCounter = Union[ConfusionMatrix, HeavyHittersSketch]
+
+
+class MetricsAggregate:
+    """Mergeable word counts and confusion matrices of the operations of a text scope.
+
+    Aggregates of utterances, files or groups of them are merged by summing their counts, while the derived rates
+    and the ranking of the operations are computed only when the aggregate is converted to a dictionary.
+
+    """
+
+    TOTALS_KEYS = ('ref_len', 'hyp_len', 'cor', 'sub', 'del', 'ins')
+    BACKTRACE_TOTALS_KEYS = ('ref_len', 'hyp_len', 'num_cor', 'num_sub', 'num_del', 'num_ins')
+
+    def __init__(self, operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix):
+        self._totals = dict.fromkeys(self.TOTALS_KEYS, 0)
+        self._operations_groups = dict()
+        self._operations_factory = operations_factory
+
+    @classmethod
+    def from_dict(cls, metrics: Mapping[str, Any],
+                  operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> MetricsAggregate:
+        """ Builds the aggregate of a text scope dictionary with 'totals' and 'operations_groups' entries. """
+
+        aggregate = cls(operations_factory)
+        metrics_totals = metrics['totals']
+        for totals_key in cls.TOTALS_KEYS:
+            aggregate._totals[totals_key] = metrics_totals[totals_key]
+        for operation_type, operations in metrics['operations_groups'].items():
+            aggregate._operations_groups[operation_type] = operations_factory().update(operations)
+        return aggregate
+
+    @classmethod
+    def from_backtrace(cls, backtrace: Mapping[str, Any],
+                       operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> MetricsAggregate:
+        """ Builds the aggregate of a backtrace, counting its operations groups by word ids. """
+
+        aggregate = cls(operations_factory)
+        backtrace_totals = backtrace['totals']
+        for totals_key, backtrace_key in zip(cls.TOTALS_KEYS, cls.BACKTRACE_TOTALS_KEYS):
+            aggregate._totals[totals_key] = backtrace_totals[backtrace_key]
+        for operations_group in backtrace['operations_groups'].values():
+            aggregate._operations_groups[operations_group.operations_type] = \
+                operations_factory().update_operations_group(operations_group)
+        return aggregate
+
+    def merge(self, other: MetricsAggregate) -> MetricsAggregate:
+        """ Adds the counts of another aggregate to this one and returns it. """
+
+        for totals_key, count in other._totals.items():
+            self._totals[totals_key] += count
+        for operation_type, other_operations in other._operations_groups.items():
+            self._operations_groups.setdefault(operation_type, self._operations_factory()).merge(other_operations)
+        return self
+
+    def totals_to_dict(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        return {'totals': MetricsCalculator.compute_words_metrics(self._totals['cor'], self._totals['sub'],
+                                                                  self._totals['del'], self._totals['ins'],
+                                                                  self._totals['ref_len'], self._totals['hyp_len'])}
+
+    def operations_groups_to_dict(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        operations_groups = collections.defaultdict()
+        for operation_type, operations in self._operations_groups.items():
+            operations_groups[operation_type] = operations.to_dict()
+        return {'operations_groups': operations_groups}
+
+    def to_dict(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        metrics = collections.defaultdict()
+        metrics.update(self.totals_to_dict())
+        metrics.update(self.operations_groups_to_dict())
+        return metrics
+
+
+class GlobalMetricsAggregate:
+    """ Mergeable aggregates of the overall text, of the text without event tags and of each event tag. """
+
+    def __init__(self, operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix):
+        self._overall_text = MetricsAggregate(operations_factory)
+        # Not available when only totals are computed
+        self._without_tags_text = None
+        self._event_tags = dict()
+        self._operations_factory = operations_factory
+
+    @classmethod
+    def from_dict(cls, metrics: Mapping[str, Any],
+                  operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> GlobalMetricsAggregate:
+        """ TODO - Function DOC """
+
+        aggregate = cls(operations_factory)
+        aggregate._overall_text = MetricsAggregate.from_dict(metrics['overall_text'], operations_factory)
+        if 'without_tags_text' in metrics:
+            aggregate._without_tags_text = MetricsAggregate.from_dict(metrics['without_tags_text'], operations_factory)
+        for event_name, event_metrics in metrics['event_tags'].items():
+            aggregate._event_tags[event_name] = MetricsAggregate.from_dict(event_metrics, operations_factory)
+        return aggregate
+
+    @classmethod
+    def from_backtraces(cls, backtraces: Mapping[str, Any],
+                        operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> \
+            GlobalMetricsAggregate:
+        """ Builds the aggregate of the backtraces of an utterance, which has only the overall one when only totals are
+        computed. """
+
+        aggregate = cls(operations_factory)
+        aggregate._overall_text = MetricsAggregate.from_backtrace(backtraces['overall_backtrace'], operations_factory)
+        if 'no_event_tags_backtrace' in backtraces:
+            aggregate._without_tags_text = MetricsAggregate.from_backtrace(backtraces['no_event_tags_backtrace'],
+                                                                           operations_factory)
+        for event_name, event_backtrace in backtraces.get('event_tags_backtrace', dict()).items():
+            aggregate._event_tags[event_name] = MetricsAggregate.from_backtrace(event_backtrace, operations_factory)
+        return aggregate
+
+    def merge(self, other: GlobalMetricsAggregate) -> GlobalMetricsAggregate:
+        """ Adds the counts of another aggregate to this one and returns it. """
+
+        self._overall_text.merge(other._overall_text)
+        if other._without_tags_text is not None:
+            if self._without_tags_text is None:
+                self._without_tags_text = MetricsAggregate(self._operations_factory)
+            self._without_tags_text.merge(other._without_tags_text)
+        for event_name, event_aggregate in other._event_tags.items():
+            self._event_tags.setdefault(event_name, MetricsAggregate(self._operations_factory)).merge(event_aggregate)
+        return self
+
+    def to_dict(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        global_metrics = collections.defaultdict()
+        global_metrics['overall_text'] = self._overall_text.to_dict()
+        if self._without_tags_text is not None:
+            global_metrics['without_tags_text'] = self._without_tags_text.to_dict()
+        event_tags_metrics = collections.defaultdict()
+        for event_name, event_aggregate in self._event_tags.items():
+            event_tags_metrics[event_name.lower()] = event_aggregate.to_dict()
+        global_metrics['event_tags'] = event_tags_metrics
+        return global_metrics
+
+
+class GroupedMetricsAggregate:
+    """ Mergeable global aggregate together with those of each language, of each language audio note and of each
+    audio note. """
+
+    def __init__(self, operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix):
+        self._global = GlobalMetricsAggregate(operations_factory)
+        self._languages = dict()
+        self._languages_audio_notes = dict()
+        self._audio_notes = dict()
+        self._operations_factory = operations_factory
+
+    @classmethod
+    def from_dict(cls, metrics: Mapping[str, Any],
+                  operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> GroupedMetricsAggregate:
+        """ Builds the aggregate of a file or corpus metrics dictionary. """
+
+        aggregate = cls(operations_factory)
+        aggregate._global = GlobalMetricsAggregate.from_dict(metrics, operations_factory)
+        for language_code, language_metrics in metrics['languages'].items():
+            aggregate._languages[language_code] = GlobalMetricsAggregate.from_dict(language_metrics,
+                                                                                   operations_factory)
+            aggregate._languages_audio_notes[language_code] = {
+                audio_note: GlobalMetricsAggregate.from_dict(audio_note_metrics, operations_factory)
+                for audio_note, audio_note_metrics in language_metrics['audio_notes'].items()
+            }
+        for audio_note, audio_note_metrics in metrics['audio_notes'].items():
+            aggregate._audio_notes[audio_note] = GlobalMetricsAggregate.from_dict(audio_note_metrics,
+                                                                                  operations_factory)
+        return aggregate
+
+    def add(self, aggregate: GlobalMetricsAggregate, language_code: str, audio_note: str) -> GroupedMetricsAggregate:
+        """ Adds the aggregate of an utterance with the given language and audio note and returns this one. """
+
+        self._global.merge(aggregate)
+        self._languages.setdefault(language_code, GlobalMetricsAggregate(self._operations_factory)).merge(aggregate)
+        self._languages_audio_notes.setdefault(language_code, dict()).setdefault(
+            audio_note, GlobalMetricsAggregate(self._operations_factory)).merge(aggregate)
+        self._audio_notes.setdefault(audio_note, GlobalMetricsAggregate(self._operations_factory)).merge(aggregate)
+        return self
+
+    def merge(self, other: GroupedMetricsAggregate) -> GroupedMetricsAggregate:
+        """ Adds the counts of another aggregate to this one and returns it. """
+
+        self._global.merge(other._global)
+        for language_code, language_aggregate in other._languages.items():
+            self._languages.setdefault(language_code, GlobalMetricsAggregate(self._operations_factory)).merge(
+                language_aggregate)
+            language_audio_notes = self._languages_audio_notes.setdefault(language_code, dict())
+            for audio_note, audio_note_aggregate in other._languages_audio_notes[language_code].items():
+                language_audio_notes.setdefault(audio_note, GlobalMetricsAggregate(self._operations_factory)).merge(
+                    audio_note_aggregate)
+        for audio_note, audio_note_aggregate in other._audio_notes.items():
+            self._audio_notes.setdefault(audio_note, GlobalMetricsAggregate(self._operations_factory)).merge(
+                audio_note_aggregate)
+        return self
+
+    def to_dict(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        metrics = collections.defaultdict()
+        metrics.update(self._global.to_dict())
+        metrics['languages'] = collections.defaultdict(collections.defaultdict)
+        for language_code, language_aggregate in self._languages.items():
+            metrics['languages'][language_code].update(language_aggregate.to_dict())
+            metrics['languages'][language_code]['audio_notes'] = self._audio_notes_to_dict(
+                self._languages_audio_notes[language_code])
+        metrics['audio_notes'] = self._audio_notes_to_dict(self._audio_notes)
+        return metrics
+
+    @staticmethod
+    def _audio_notes_to_dict(audio_notes: Mapping[str, GlobalMetricsAggregate]) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        audio_notes_metrics = collections.defaultdict(collections.defaultdict)
+        for audio_note, audio_note_aggregate in audio_notes.items():
+            audio_notes_metrics[audio_note].update(audio_note_aggregate.to_dict())
+        return audio_notes_metrics
+
+
+class MetricsCube:
+    """Pre-aggregated counts of a corpus evaluation indexed by file, language, audio note and text scope.
+
+    Totals are stored in a dense array with one cell for each combination of the four dimensions, while the operations
+    counts of each operation type are stored grouped by cell, with the offsets of the group of each cell (compressed
+    sparse rows), in the order they appear in the metrics. Any selection of cells is then resolved with array slicing
+    and sums over the groups of the selected cells only, without walking the metrics dictionaries.
+
+    """
+
+    TEXT_SCOPES = ('overall_text', 'without_tags_text')
+
+    def __init__(self, corpus_metrics: Mapping[str, Any]):
+        files_metrics = corpus_metrics['files']
+        self._files = {file_name: index for index, file_name in enumerate(files_metrics)}
+        self._languages = dict()
+        self._audio_notes = dict()
+        self._scopes = {scope: index for index, scope in enumerate(self.TEXT_SCOPES)}
+        for file_metrics in files_metrics.values():
+            for language_code, language_metrics in file_metrics['languages'].items():
+                self._languages.setdefault(language_code, len(self._languages))
+                for audio_note, audio_note_metrics in language_metrics['audio_notes'].items():
+                    self._audio_notes.setdefault(audio_note, len(self._audio_notes))
+                    for event_name in audio_note_metrics['event_tags']:
+                        self._scopes.setdefault(event_name, len(self._scopes))
+        self._shape = (len(self._files), len(self._languages), len(self._audio_notes), len(self._scopes))
+        self._totals = np.zeros(self._shape + (len(MetricsAggregate.TOTALS_KEYS),), dtype=np.int64)
+        self._present = np.zeros(self._shape, dtype=bool)
+        self._operation_types = dict()
+        self._operations = collections.defaultdict(dict)
+        operations_entries = collections.defaultdict(list)
+        for file_name, file_metrics in files_metrics.items():
+            for language_code, language_metrics in file_metrics['languages'].items():
+                for audio_note, audio_note_metrics in language_metrics['audio_notes'].items():
+                    cell = (self._files[file_name], self._languages[language_code], self._audio_notes[audio_note])
+                    scopes_metrics = list((scope, audio_note_metrics[scope]) for scope in self.TEXT_SCOPES
+                                          if scope in audio_note_metrics)
+                    scopes_metrics.extend(audio_note_metrics['event_tags'].items())
+                    for scope, scope_metrics in scopes_metrics:
+                        scope_cell = cell + (self._scopes[scope],)
+                        self._present[scope_cell] = True
+                        self._totals[scope_cell] = list(scope_metrics['totals'][totals_key]
+                                                        for totals_key in MetricsAggregate.TOTALS_KEYS)
+                        flat_cell = np.ravel_multi_index(scope_cell, self._shape)
+                        for operation_type, operations in scope_metrics['operations_groups'].items():
+                            self._operation_types.setdefault(operation_type, len(self._operation_types))
+                            type_operations = self._operations[operation_type]
+                            for operation, count in operations.items():
+                                operation_index = type_operations.setdefault(operation, len(type_operations))
+                                operations_entries[operation_type].append((flat_cell, operation_index, count))
+        self._operations_offsets = dict()
+        self._operations_indexes = dict()
+        self._operations_counts = dict()
+        for operation_type, entries in operations_entries.items():
+            entries = np.array(entries, dtype=np.int64).reshape(-1, 3)
+            # A stable sort keeps the operations of each cell in the order they appear in the metrics
+            entries = entries[np.argsort(entries[:, 0], kind='stable')]
+            operations_offsets = np.zeros(self._present.size + 1, dtype=np.int64)
+            np.cumsum(np.bincount(entries[:, 0], minlength=self._present.size), out=operations_offsets[1:])
+            self._operations_offsets[operation_type] = operations_offsets
+            self._operations_indexes[operation_type] = entries[:, 1].copy()
+            self._operations_counts[operation_type] = entries[:, 2].copy()
+        self._operations_names = {operation_type: list(operations)
+                                  for operation_type, operations in self._operations.items()}
+
+    def compute_metrics(self, files: Iterable[str], languages: Iterable[str], audio_notes: Iterable[str],
+                        scopes: Iterable[str], maximum_operations: int = None) -> Mapping[str, Any]:
+        """Computes the totals and operations groups of a selection of cells.
+
+        Args:
+            files (Iterable[str]):
+                The selected file names.
+            languages (Iterable[str]):
+                The selected language codes.
+            audio_notes (Iterable[str]):
+                The selected audio notes.
+            scopes (Iterable[str]):
+                The selected text scopes: 'overall_text', 'without_tags_text' or event tags names.
+            maximum_operations (int):
+                The maximum number of the most frequent operations of each operation type to return, all if not given.
+
+        Returns:
+            Mapping[str, Any]:
+                The 'totals' and 'operations_groups' of the selection, empty if no selected cell has metrics.
+
+        """
+
+        selection = np.ix_(*(list(indexes[label] for label in labels if label in indexes) for indexes, labels in
+                             ((self._files, files), (self._languages, languages),
+                              (self._audio_notes, audio_notes), (self._scopes, scopes))))
+        selected_present = self._present[selection]
+        if not selected_present.any():
+            return collections.defaultdict()
+        totals = dict(zip(MetricsAggregate.TOTALS_KEYS, self._totals[selection][selected_present].sum(axis=0).tolist()))
+        metrics = collections.defaultdict()
+        metrics['totals'] = MetricsCalculator.compute_words_metrics(totals['cor'], totals['sub'], totals['del'],
+                                                                    totals['ins'], totals['ref_len'],
+                                                                    totals['hyp_len'])
+        # Cells are visited in selection order, so that operations with equal counts are sorted by first appearance
+        selected_cells = np.ravel_multi_index(np.broadcast_arrays(*selection), self._shape).reshape(-1)
+        operations_groups = collections.defaultdict()
+        for operation_type in self._operation_types:
+            operations_indexes, operations_counts = self._get_cells_operations(operation_type, selected_cells)
+            operations_names = self._operations_names[operation_type]
+            counts = np.bincount(operations_indexes, weights=operations_counts,
+                                 minlength=len(operations_names)).astype(np.int64)
+            first_positions = np.full(len(operations_names), len(operations_indexes), dtype=np.int64)
+            np.minimum.at(first_positions, operations_indexes, np.arange(len(operations_indexes)))
+            selected_operations = np.flatnonzero(first_positions < len(operations_indexes))
+            selected_operations = selected_operations[np.lexsort((first_positions[selected_operations],
+                                                                  -counts[selected_operations]))]
+            if maximum_operations is not None:
+                selected_operations = selected_operations[:maximum_operations]
+            operations_groups[operation_type] = {
+                operations_names[operation_index]: count for operation_index, count in
+                zip(selected_operations.tolist(), counts[selected_operations].tolist())
+            }
+        metrics['operations_groups'] = operations_groups
+        return metrics
+
+    def _get_cells_operations(self, operation_type: str, cells: np.ndarray) -> (np.ndarray, np.ndarray):
+        """ Returns the operations indexes and counts of an operation type in a sequence of flat cells, in order. """
+
+        operations_offsets = self._operations_offsets.get(operation_type)
+        if operations_offsets is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        cells_starts = operations_offsets[cells]
+        cells_lengths = operations_offsets[cells + 1] - cells_starts
+        # Positions of the entries of each cell, shifted from where the cell starts in the result to where it is stored
+        cells_shifts = cells_starts - (np.cumsum(cells_lengths) - cells_lengths)
+        entries_positions = np.arange(cells_lengths.sum()) + np.repeat(cells_shifts, cells_lengths)
+        return self._operations_indexes[operation_type][entries_positions], \
+            self._operations_counts[operation_type][entries_positions]
+
+
+class MetricsReport:
+    """Binary metrics report, loadable one section at a time.
+
+    The report starts with a magic number, followed by the serialized sections and by the index of their offsets,
+    whose own offset is stored in the last 8 bytes. A section holds either the global metrics of a file (or of the
+    corpus, with an empty file name) for a language, a language audio note or an audio note, or the utterances metrics
+    of a file. Only counts are stored: the words metrics are recomputed when a section is read.
+
+    """
+
+    MAGIC = b'FMR1'
+    INDEX_OFFSET_SIZE = 8
+    SectionType = metrics_report_pb2.MetricsReportSection.SectionType
+
+    def __init__(self, file_path: str):
+        self._file_path = file_path
+        with open(file_path, 'rb') as report_file:
+            if report_file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError('{} is not a binary metrics report.'.format(file_path))
+            report_file.seek(-self.INDEX_OFFSET_SIZE, os.SEEK_END)
+            index_end = report_file.tell()
+            index_offset = int.from_bytes(report_file.read(self.INDEX_OFFSET_SIZE), 'little')
+            report_file.seek(index_offset)
+            report_index = metrics_report_pb2.MetricsReportIndex.FromString(
+                report_file.read(index_end - index_offset))
+        self._files = list(report_index.files)
+        self._sections = dict()
+        self._files_sections = collections.defaultdict(list)
+        for section in report_index.sections:
+            self._sections[(section.type, section.file, section.language, section.audio_note)] = (section.offset,
+                                                                                                  section.length)
+            self._files_sections[section.file].append((section.type, section.language, section.audio_note))
+
+    @property
+    def files(self) -> [str]:
+        """ The names of the files of the report, in evaluation order. """
+
+        return list(self._files)
+
+    def get_metrics(self, file_name: str = '', language_code: str = None, audio_note: str = None) -> \
+            Mapping[str, Any]:
+        """Reads the global metrics of a single section.
+
+        Args:
+            file_name (str):
+                The name of the file, or an empty string for the whole report.
+            language_code (str):
+                The language code, or None for all the languages.
+            audio_note (str):
+                The audio note, or None for all the audio notes.
+
+        Returns:
+            Mapping[str, Any]:
+                The 'overall_text', 'without_tags_text' and 'event_tags' metrics of the section.
+
+        """
+
+        if language_code is not None and audio_note is not None:
+            section_type = self.SectionType.LANGUAGE_AUDIO_NOTE
+        elif language_code is not None:
+            section_type = self.SectionType.LANGUAGE
+        elif audio_note is not None:
+            section_type = self.SectionType.AUDIO_NOTE
+        else:
+            section_type = self.SectionType.GLOBAL
+        global_metrics = self._read_section(metrics_report_pb2.GlobalMetrics, section_type, file_name,
+                                            language_code or '', audio_note or '')
+        return self._global_metrics_to_dict(global_metrics)
+
+    def get_utterances_metrics(self, file_name: str = '') -> Mapping[str, Any]:
+        """ Reads the utterances metrics of a file, or an empty dictionary if the report doesn't include them. """
+
+        utterances_metrics = collections.defaultdict()
+        if (self.SectionType.UTTERANCES, file_name, '', '') not in self._sections:
+            return utterances_metrics
+        for utterance in self._read_section(metrics_report_pb2.UtterancesMetrics, self.SectionType.UTTERANCES,
+                                            file_name).utterances:
+            utterance_metrics = collections.defaultdict()
+            utterance_metrics['language'] = utterance.language
+            utterance_metrics['audio_note'] = utterance.audio_note
+            utterance_metrics.update(self._global_metrics_to_dict(utterance.metrics))
+            utterances_metrics[utterance.id] = utterance_metrics
+        return utterances_metrics
+
+    def to_dict(self, file_name: str = '') -> Mapping[str, Any]:
+        """ Reads the metrics tree of a file, or of the whole report, as written in the JSON reports. """
+
+        metrics = collections.defaultdict()
+        metrics.update(self.get_metrics(file_name))
+        metrics['languages'] = collections.defaultdict(collections.defaultdict)
+        metrics['audio_notes'] = collections.defaultdict(collections.defaultdict)
+        for section_type, language_code, audio_note in self._files_sections[file_name]:
+            if section_type == self.SectionType.LANGUAGE:
+                metrics['languages'][language_code].update(self.get_metrics(file_name, language_code=language_code))
+                metrics['languages'][language_code]['audio_notes'] = collections.defaultdict(
+                    collections.defaultdict)
+            elif section_type == self.SectionType.LANGUAGE_AUDIO_NOTE:
+                metrics['languages'][language_code]['audio_notes'][audio_note].update(
+                    self.get_metrics(file_name, language_code, audio_note))
+            elif section_type == self.SectionType.AUDIO_NOTE:
+                metrics['audio_notes'][audio_note].update(self.get_metrics(file_name, audio_note=audio_note))
+            elif section_type == self.SectionType.UTTERANCES:
+                metrics['utterances'] = self.get_utterances_metrics(file_name)
+        if not file_name and self._files:
+            metrics['files'] = collections.defaultdict()
+            for report_file_name in self._files:
+                metrics['files'][report_file_name] = self.to_dict(report_file_name)
+        return metrics
+
+    def export_json(self, file_path: str) -> None:
+        """ Writes the whole report as a JSON report. """
+
+        utilities.write_local_file(file_path, json.dumps(self.to_dict(), indent=4))
+
+    @classmethod
+    def write(cls, file_path: str, metrics: Mapping[str, Any]) -> None:
+        """ Writes the binary report of a corpus metrics tree with 'files', or of a file metrics tree. """
+
+        utilities.write_local_file(file_path, cls._get_report_chunks(metrics), mode='wb')
+
+    @classmethod
+    def _get_report_chunks(cls, metrics: Mapping[str, Any]) -> Iterator[bytes]:
+        """ Serializes the sections of a metrics tree one at a time, followed by their index. """
+
+        report_index = metrics_report_pb2.MetricsReportIndex()
+        report_offset = len(cls.MAGIC)
+        yield cls.MAGIC
+        files_metrics = metrics.get('files', dict())
+        report_index.files.extend(files_metrics)
+        for file_name, file_metrics in itertools.chain((('', metrics),), files_metrics.items()):
+            for section_key, section in cls._get_sections(file_metrics):
+                section_type, language_code, audio_note = section_key
+                section_bytes = section.SerializeToString()
+                report_index.sections.add(type=section_type, file=file_name, language=language_code,
+                                          audio_note=audio_note, offset=report_offset, length=len(section_bytes))
+                report_offset += len(section_bytes)
+                yield section_bytes
+        yield report_index.SerializeToString()
+        yield report_offset.to_bytes(cls.INDEX_OFFSET_SIZE, 'little')
+
+    @classmethod
+    def _get_sections(cls, metrics: Mapping[str, Any]) -> Iterator[((int, str, str), Any)]:
+        """ Yields the key and message of each section of a file or corpus metrics tree. """
+
+        yield (cls.SectionType.GLOBAL, '', ''), cls._global_metrics_to_message(metrics)
+        for language_code, language_metrics in metrics['languages'].items():
+            yield (cls.SectionType.LANGUAGE, language_code, ''), cls._global_metrics_to_message(language_metrics)
+            for audio_note, audio_note_metrics in language_metrics['audio_notes'].items():
+                yield (cls.SectionType.LANGUAGE_AUDIO_NOTE, language_code, audio_note), \
+                    cls._global_metrics_to_message(audio_note_metrics)
+        for audio_note, audio_note_metrics in metrics['audio_notes'].items():
+            yield (cls.SectionType.AUDIO_NOTE, '', audio_note), cls._global_metrics_to_message(audio_note_metrics)
+        if 'utterances' in metrics:
+            utterances = metrics_report_pb2.UtterancesMetrics()
+            for utterance_id, utterance_metrics in metrics['utterances'].items():
+                utterances.utterances.add(id=utterance_id, language=utterance_metrics['language'],
+                                          audio_note=utterance_metrics['audio_note'],
+                                          metrics=cls._global_metrics_to_message(utterance_metrics))
+            yield (cls.SectionType.UTTERANCES, '', ''), utterances
+
+    def _read_section(self, message_type: type, section_type: int, file_name: str, language_code: str = '',
+                      audio_note: str = ''):
+        """ Reads and parses a single section of the report. """
+
+        section_key = (section_type, file_name, language_code, audio_note)
+        if section_key not in self._sections:
+            raise KeyError('No metrics for file "{}", language "{}" and audio note "{}".'.format(
+                file_name, language_code, audio_note))
+        offset, length = self._sections[section_key]
+        with open(self._file_path, 'rb') as report_file:
+            report_file.seek(offset)
+            return message_type.FromString(report_file.read(length))
+
+    @classmethod
+    def _global_metrics_to_message(cls, metrics: Mapping[str, Any]) -> metrics_report_pb2.GlobalMetrics:
+        """ TODO - Function DOC """
+
+        global_metrics = metrics_report_pb2.GlobalMetrics()
+        cls._set_text_metrics(global_metrics.overall_text, metrics['overall_text'])
+        if 'without_tags_text' in metrics:
+            cls._set_text_metrics(global_metrics.without_tags_text, metrics['without_tags_text'])
+        for event_name, event_metrics in metrics['event_tags'].items():
+            cls._set_text_metrics(global_metrics.event_tags.add(name=event_name).metrics, event_metrics)
+        return global_metrics
+
+    @staticmethod
+    def _set_text_metrics(text_metrics: metrics_report_pb2.TextMetrics, metrics: Mapping[str, Any]) -> None:
+        """ TODO - Function DOC """
+
+        metrics_totals = metrics['totals']
+        text_metrics.reference_length = metrics_totals['ref_len']
+        text_metrics.hypothesis_length = metrics_totals['hyp_len']
+        text_metrics.correct = metrics_totals['cor']
+        text_metrics.substitutions = metrics_totals['sub']
+        text_metrics.deletions = metrics_totals['del']
+        text_metrics.insertions = metrics_totals['ins']
+        for operation_type, operations in metrics['operations_groups'].items():
+            operations_group = text_metrics.operations_groups.add(type=operation_type)
+            for operation_name, count in operations.items():
+                operations_group.operations.add(name=operation_name, count=count)
+
+    @classmethod
+    def _global_metrics_to_dict(cls, global_metrics: metrics_report_pb2.GlobalMetrics) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        metrics = collections.defaultdict()
+        metrics['overall_text'] = cls._text_metrics_to_dict(global_metrics.overall_text)
+        if global_metrics.HasField('without_tags_text'):
+            metrics['without_tags_text'] = cls._text_metrics_to_dict(global_metrics.without_tags_text)
+        metrics['event_tags'] = collections.defaultdict()
+        for event_tag in global_metrics.event_tags:
+            metrics['event_tags'][event_tag.name] = cls._text_metrics_to_dict(event_tag.metrics)
+        return metrics
+
+    @staticmethod
+    def _text_metrics_to_dict(text_metrics: metrics_report_pb2.TextMetrics) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        return {
+            'totals': MetricsCalculator.compute_words_metrics(text_metrics.correct, text_metrics.substitutions,
+                                                              text_metrics.deletions, text_metrics.insertions,
+                                                              text_metrics.reference_length,
+                                                              text_metrics.hypothesis_length),
+            'operations_groups': {operations_group.type: {operation.name: operation.count
+                                                          for operation in operations_group.operations}
+                                  for operations_group in text_metrics.operations_groups}
+        }
+
+
 class MetricsCalculator:
     """ TODO - Class DOC """
 
     @staticmethod
-    def compute_corpus_metrics(files_metrics: Mapping[str, Any]) -> Mapping[str, Any]:
-        """ TODO - Function DOC """
-
-        corpus_metrics = collections.defaultdict()
-        # Compute global metrics
-        corpus_metrics.update(MetricsCalculator.compute_global_metrics(files_metrics.values()))
-        # Compute per language metrics
-        languages_metrics_group = MetricsCalculator._group_metrics_by_id(files_metrics.values(), 'languages')
-        corpus_metrics['languages'] = MetricsCalculator._compute_global_metrics_for_group(languages_metrics_group)
-        for language_code, language_metrics in languages_metrics_group.items():
-            current_language_metrics = corpus_metrics['languages'][language_code]
-            language_audio_note_group = MetricsCalculator._group_metrics_by_id(language_metrics, 'audio_notes')
-            current_language_metrics['audio_notes'] = MetricsCalculator._compute_global_metrics_for_group(
-                language_audio_note_group)
-        # Compute per audio notes language metrics
-        audio_notes_metrics_group = MetricsCalculator._group_metrics_by_id(files_metrics.values(), 'audio_notes')
-        corpus_metrics['audio_notes'] = MetricsCalculator._compute_global_metrics_for_group(audio_notes_metrics_group)
-        return corpus_metrics
+    def compute_corpus_metrics(files_metrics: Mapping[str, Any],
+                               operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> \
+            Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        # Files aggregates are merged in a single pass over the files
+        corpus_aggregate = GroupedMetricsAggregate(operations_factory)
+        for file_metrics in files_metrics.values():
+            corpus_aggregate.merge(GroupedMetricsAggregate.from_dict(file_metrics, operations_factory))
+        return corpus_aggregate.to_dict()
 
     @staticmethod
-    def compute_file_metrics(utterances_metrics: Mapping[str, Any]) -> Mapping[str, Any]:
+    def compute_file_metrics(utterances_metrics: Mapping[str, Any],
+                             operations_factory: Callable[[], OperationsCounter] = ConfusionMatrix) -> \
+            Mapping[str, Any]:
         """ TODO - Function DOC """
 
-        file_metrics = collections.defaultdict()
-        # Compute global metrics
-        file_metrics.update(MetricsCalculator.compute_global_metrics(utterances_metrics.values()))
-        # Compute per language metrics
-        language_metrics_group = MetricsCalculator._group_metrics_by_field(utterances_metrics.values(), 'language')
-        file_metrics['languages'] = MetricsCalculator._compute_global_metrics_for_group(language_metrics_group)
-        for language_code, language_metrics in language_metrics_group.items():
-            current_language_metrics = file_metrics['languages'][language_code]
-            language_audio_note_group = MetricsCalculator._group_metrics_by_field(language_metrics, 'audio_note')
-            current_language_metrics['audio_notes'] = MetricsCalculator._compute_global_metrics_for_group(
-                language_audio_note_group)
-        # Compute per audio note tag metrics
-        audio_note_metrics_group = MetricsCalculator._group_metrics_by_field(utterances_metrics.values(), 'audio_note')
-        file_metrics['audio_notes'] = MetricsCalculator._compute_global_metrics_for_group(audio_note_metrics_group)
-        return file_metrics
+        # Utterances aggregates are added in a single pass over the utterances
+        file_aggregate = GroupedMetricsAggregate(operations_factory)
+        for utterance_metrics in utterances_metrics.values():
+            file_aggregate.add(GlobalMetricsAggregate.from_dict(utterance_metrics, operations_factory),
+                               utterance_metrics['language'], utterance_metrics['audio_note'])
+        return file_aggregate.to_dict()
 
     @staticmethod
     def compute_utterance_metrics(backtrace: Mapping[str, Any]) -> Mapping[str, Any]:
@@ -186,69 +1092,63 @@ class MetricsCalculator:
                 backtrace['operations_groups'].values())
         }
 
+    @staticmethod
+    def compute_records_metrics(alignment_records: records.AlignmentRecords, group_columns: Iterable[str] = (),
+                                scope: str = 'overall_text') -> Mapping[tuple, Mapping[str, Any]]:
+        """Computes the words metrics of the groups of aligned operations records that share some label columns.
+
+        Args:
+            alignment_records (records.AlignmentRecords):
+                The aligned operations records.
+            group_columns (Iterable[str]):
+                The label columns to group by, e.g. ('file', 'language').
+            scope (str):
+                The text scope of the records, as accepted by records.AlignmentRecords.get_scope_weights.
+
+        Returns:
+            Mapping[tuple, Mapping[str, Any]]:
+                The words metrics of the labels of each group.
+
+        """
+
+        records_metrics = collections.defaultdict()
+        operations_counts = alignment_records.count_operations(group_columns, scope)
+        for group_labels, counts in operations_counts.items():
+            num_cor, num_ins, num_del, num_sub = (int(count) for count in counts)
+            # As in the backtrace, reference and hypothesis lengths count the operations that are not insertions
+            records_metrics[group_labels] = MetricsCalculator.compute_words_metrics(
+                num_cor, num_sub, num_del, num_ins, num_cor + num_sub + num_del, num_cor + num_sub + num_del)
+        return records_metrics
+
     @staticmethod
     def compute_global_metrics(metrics: Iterable[Mapping[str, Any]]):
         """ TODO - Function DOC """
 
-        global_metrics = collections.defaultdict()
-
-        # Compute overall text metrics
-        overall_text_inputs = list(metric['overall_text'] for metric in metrics)
-        global_metrics['overall_text'] = MetricsCalculator.compute_totals_metrics(overall_text_inputs)
-        global_metrics['overall_text'].update(MetricsCalculator.compute_operations_groups(overall_text_inputs))
-
-        # Compute without event tags text metrics
-        without_tags_inputs = list(metric['without_tags_text'] for metric in metrics)
-        global_metrics['without_tags_text'] = MetricsCalculator.compute_totals_metrics(without_tags_inputs)
-        global_metrics['without_tags_text'].update(MetricsCalculator.compute_operations_groups(without_tags_inputs))
-
-        # Compute event tags metrics
-        global_metrics.update(MetricsCalculator.compute_event_tags_metrics(metrics))
-
-        return global_metrics
+        global_aggregate = GlobalMetricsAggregate()
+        for metric in metrics:
+            global_aggregate.merge(GlobalMetricsAggregate.from_dict(metric))
+        return global_aggregate.to_dict()
 
     @staticmethod
     def compute_totals_metrics(metrics: Iterable[Mapping[str, Any]]) -> Mapping[str, Any]:
         """ TODO - Function DOC """
 
-        totals_metrics = collections.defaultdict()
-        input_totals = list(metric['totals'] for metric in metrics)
-        total_ref_len = sum(metric['ref_len'] for metric in input_totals)
-        total_hyp_len = sum(metric['hyp_len'] for metric in input_totals)
-        total_num_cor = sum(metric['cor'] for metric in input_totals)
-        total_num_sub = sum(metric['sub'] for metric in input_totals)
-        total_num_del = sum(metric['del'] for metric in input_totals)
-        total_num_ins = sum(metric['ins'] for metric in input_totals)
-        totals_metrics.update(MetricsCalculator.compute_words_metrics(total_num_cor, total_num_sub, total_num_del,
-                                                                      total_num_ins, total_ref_len, total_hyp_len))
-        return {'totals': totals_metrics}
+        return MetricsCalculator._merge_metrics(metrics).totals_to_dict()
 
     @staticmethod
     def compute_event_tags_metrics(metrics: Iterable[Mapping[str, Any]]) -> Mapping[str, Mapping[str, Any]]:
         """ TODO - Function DOC """
 
-        event_tags_group = MetricsCalculator._group_metrics_by_id(metrics, 'event_tags')
-        event_tags_metrics = collections.defaultdict()
-        for event_name, event_tag_metrics in event_tags_group.items():
-            event_key = event_name.lower()
-            event_tags_metrics[event_key] = MetricsCalculator.compute_totals_metrics(event_tag_metrics)
-            event_tags_metrics[event_key].update(MetricsCalculator.compute_operations_groups(event_tag_metrics))
-        return {'event_tags': event_tags_metrics}
+        global_aggregate = GlobalMetricsAggregate()
+        for metric in metrics:
+            global_aggregate.merge(GlobalMetricsAggregate.from_dict(metric))
+        return {'event_tags': global_aggregate.to_dict()['event_tags']}
 
     @staticmethod
     def compute_operations_groups(metrics: Iterable[Mapping[str, Any]]) -> Mapping[str, Any]:
         """ TODO - Function DOC """
 
-        operations_groups_group = MetricsCalculator._group_metrics_by_id(metrics, 'operations_groups')
-        operations_groups = collections.defaultdict()
-        for operation_type, per_type_operation_groups in operations_groups_group.items():
-            operations_groups[operation_type] = collections.defaultdict(int)
-            for per_type_operation_group in per_type_operation_groups:
-                for operation, count in per_type_operation_group.items():
-                    operations_groups[operation_type][operation] += count
-            operations_groups[operation_type] = dict(sorted(operations_groups[operation_type].items(),
-                                                            key=lambda item: item[1], reverse=True))
-        return {'operations_groups': operations_groups}
+        return MetricsCalculator._merge_metrics(metrics).operations_groups_to_dict()
 
     @staticmethod
     def compute_words_metrics(num_cor: int, num_sub: int, num_del: int, num_ins: int, num_reference_words: int,
@@ -301,68 +1201,111 @@ class MetricsCalculator:
         return word_information_lost
 
     @staticmethod
-    def _compute_global_metrics_for_group(metrics_group: Mapping[str, Iterable[Mapping[str, Any]]]):
+    def _merge_metrics(metrics: Iterable[Mapping[str, Any]]) -> MetricsAggregate:
         """ TODO - Function DOC """
 
-        global_metrics = collections.defaultdict(lambda: collections.defaultdict())
-        for metrics_id, metrics in metrics_group.items():
-            global_metrics[metrics_id].update(MetricsCalculator.compute_global_metrics(metrics))
-        return global_metrics
-
-    @staticmethod
-    def _group_metrics_by_field(metrics: Iterable[Mapping[str, Any]], field: str) -> \
-            Mapping[str, Iterable[Mapping[str, Any]]]:
-        """ TODO - Function DOC """
-
-        metrics_group = collections.defaultdict(list)
+        aggregate = MetricsAggregate()
         for metric in metrics:
-            metrics_group[metric[field]].append(metric)
-        return metrics_group
+            aggregate.merge(MetricsAggregate.from_dict(metric))
+        return aggregate
 
-    @staticmethod
-    def _group_metrics_by_id(metrics: Iterable[Mapping[str, Any]], metric_id: str) -> \
-            Mapping[str, Iterable[Mapping[str, Any]]]:
-        """ TODO - Function DOC """
 
-        filtered_metrics = list(metric[metric_id] for metric in metrics)
-        metrics_group = collections.defaultdict(list)
-        for filtered_metric in filtered_metrics:
-            for metric_id, metric in filtered_metric.items():
-                metrics_group[metric_id].append(metric)
-        return metrics_group
+def _compute_file_metrics(metrics_class: type, metrics_arguments: Mapping[str, Any], canonical_reference: str,
+                          canonical_hypothesis: str) -> (str, Mapping[str, Any], Any):
+    """ Computes the name, the metrics and the aggregate of a file in a worker process, with metrics built from the
+    picklable arguments of the instance that submitted it. """
+
+    metrics = metrics_class(list(), list(), **metrics_arguments)
+    return metrics._compute_file_metrics(canonical_reference, canonical_hypothesis)
 
 
 class Metrics(ABC):
     """ TODO - Class DOC """
 
-    def __init__(self, canonical_references: Iterable[str], canonical_hypotheses: Iterable[str]):
-        self._corpus = zip(canonical_references, canonical_hypotheses)
+    def __init__(self, canonical_references: Iterable[str], canonical_hypotheses: Iterable[str],
+                 vocabulary: alignment.Vocabulary = None, computation_configuration: Mapping[str, Any] = None):
+        self._corpus = list(zip(canonical_references, canonical_hypotheses))
         self._corpus_metrics = collections.defaultdict()
+        self._vocabulary = vocabulary if vocabulary else alignment.Vocabulary()
+        self._computation_config = computation_configuration if computation_configuration else \
+            utilities.load_configuration_section(ConfigSections.COMPUTATION)
 
     def metrics(self) -> Mapping[str, Any]:
         """ TODO - Function DOC """
 
+        for _ in self.files_metrics():
+            pass
+        return self._corpus_metrics
+
+    def files_metrics(self) -> Iterator[(str, Mapping[str, Any])]:
+        """Yields the metrics of each file as soon as they are computed, then computes the corpus metrics.
+
+        Yields:
+            (str, Mapping[str, Any]):
+                The file name and its metrics. When streaming, the utterances metrics have already been written to
+                the file report and are not included, so that only the file aggregates are kept in memory.
+
+        """
+
         files_metrics = collections.defaultdict()
-        for canonical_reference, canonical_hypothesis in self._corpus:
-            file_name = utilities.get_file_name(canonical_hypothesis)
-            print('Compute metrics for file {}...'.format(file_name))
-            ground_truth = self._get_ground_truth(canonical_reference)
-            hypotheses = self._get_hypotheses(canonical_hypothesis)
-            # Compute metrics per utterance
-            utterances_metrics = collections.defaultdict()
-            for reference, hypothesis in zip(ground_truth, hypotheses):
-                utterances_metrics[reference.id] = self._get_utterance_metrics(reference, hypothesis)
-            # Compute file metrics and update class dictionary
-            file_metrics = collections.defaultdict()
-            file_metrics.update(self._get_file_metrics(utterances_metrics))
-            file_metrics['utterances'] = utterances_metrics
+        files_aggregates = collections.defaultdict()
+        for file_name, file_metrics, file_aggregate in self._compute_files_metrics():
+            # Allow subclasses to collect what the file computation returned besides its metrics
+            self._collect_file_metrics(file_name, file_metrics)
             files_metrics[file_name] = file_metrics
+            files_aggregates[file_name] = file_aggregate
+            yield file_name, file_metrics
         # Compute file metrics and update class dictionary
-        self._corpus_metrics.update(self._get_corpus_metrics(files_metrics))
+        self._corpus_metrics.update(self._get_corpus_metrics(files_metrics, files_aggregates))
         self._corpus_metrics['files'] = files_metrics
         # Allow subclasses to inject code before return
         self._process_metrics()
-        return self._corpus_metrics
+
+    def _compute_files_metrics(self) -> Iterator[(str, Mapping[str, Any], Any)]:
+        """ TODO - Function DOC """
+
+        canonical_references = list(canonical_reference for canonical_reference, _ in self._corpus)
+        canonical_hypotheses = list(canonical_hypothesis for _, canonical_hypothesis in self._corpus)
+        workers = self._computation_config[Computation.WORKERS]
+        if workers > 1 and len(self._corpus) > 1:
+            # Files are independent of each other: results are yielded in corpus order. Each file is computed by a
+            # new instance built in the worker process, so that this one is never pickled
+            compute_file_metrics = functools.partial(_compute_file_metrics, type(self), self._get_worker_arguments())
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(compute_file_metrics, canonical_references, canonical_hypotheses)
+        else:
+            yield from map(self._compute_file_metrics, canonical_references, canonical_hypotheses)
+
+    def _compute_file_metrics(self, canonical_reference: str, canonical_hypothesis: str) -> \
+            (str, Mapping[str, Any], Any):
+        """ Returns the name, the metrics and the aggregate of a file. Nothing computed for the file is kept in the
+        instance, so that files can be computed by other processes. """
+
+        file_name = utilities.get_file_name(canonical_hypothesis)
+        print('Compute metrics for file {}...'.format(file_name))
+        ground_truth = self._get_ground_truth(canonical_reference)
+        hypotheses = self._get_hypotheses(canonical_hypothesis)
+        # Allow subclasses to inject code before the utterances metrics are computed
+        self._pre_utterances_metrics_compute(file_name, ground_truth, hypotheses)
+        # Compute metrics per utterance
+        utterances_metrics = collections.defaultdict()
+        utterances_aggregates = collections.defaultdict()
+        for reference, hypothesis in zip(ground_truth, hypotheses):
+            utterances_metrics[reference.id], utterances_aggregates[reference.id] = self._get_utterance_metrics(
+                reference, hypothesis)
+        # Compute file metrics
+        file_metrics = collections.defaultdict()
+        file_aggregate_metrics, file_aggregate = self._get_file_metrics(utterances_metrics, utterances_aggregates)
+        file_metrics.update(file_aggregate_metrics)
+        file_metrics['utterances'] = utterances_metrics
+        # Allow subclasses to inject code before the file metrics are collected
+        self._process_file_metrics(file_name, file_metrics)
+        return file_name, file_metrics, file_aggregate
+
+    def _get_worker_arguments(self) -> Mapping[str, Any]:
+        """ Returns the arguments, besides the corpus, that build an instance computing files in the same way. """
+
+        return {'computation_configuration': self._computation_config}
 
     def _get_ground_truth(self, canonical_reference: str) -> [CanonicalUtterance]:
         """ TODO - Function DOC """
@@ -381,17 +1324,25 @@ class Metrics(ABC):
             canonical_transcription.utterances
 
     @abstractmethod
-    def _get_corpus_metrics(self, files_metrics: Mapping[str, Any]) -> Mapping[str, Any]:
-        """ TODO - Function DOC """
+    def _collect_file_metrics(self, file_name: str, file_metrics: Mapping[str, Any]) -> None:
+        """ Called in the main process with the metrics of each file, which can also come from a worker process. """
 
         pass
 
     @abstractmethod
-    def _get_file_metrics(self, utterances_metrics: Mapping[str, Any]) -> Mapping[str, Any]:
+    def _get_corpus_metrics(self, files_metrics: Mapping[str, Any], files_aggregates: Mapping[str, Any]) -> \
+            Mapping[str, Any]:
         """ TODO - Function DOC """
 
         pass
 
+    @abstractmethod
+    def _get_file_metrics(self, utterances_metrics: Mapping[str, Any], utterances_aggregates: Mapping[str, Any]) -> \
+            (Mapping[str, Any], Any):
+        """ Returns the metrics of a file and the aggregate they were computed from. """
+
+        pass
+
     @abstractmethod
     def _get_transcription_evaluator(self):
         """ TODO - Function DOC """
@@ -400,7 +1351,20 @@ class Metrics(ABC):
 
     @abstractmethod
     def _get_utterance_metrics(self, reference: CanonicalUtterance, hypothesis: CanonicalUtterance) -> \
-            Mapping[str, Any]:
+            (Mapping[str, Any], Any):
+        """ Returns the metrics of an utterance and the aggregate they were computed from. """
+
+        pass
+
+    @abstractmethod
+    def _pre_utterances_metrics_compute(self, file_name: str, references: [CanonicalUtterance],
+                                        hypotheses: [CanonicalUtterance]) -> None:
+        """ TODO - Function DOC """
+
+        pass
+
+    @abstractmethod
+    def _process_file_metrics(self, file_name: str, file_metrics: Mapping[str, Any]) -> None:
         """ TODO - Function DOC """
 
         pass
@@ -419,44 +1383,118 @@ class DefaultMetrics(Metrics):
                               CanonicalToken.CanonicalTokenType.INCIDENT_EVENT,
                               CanonicalToken.CanonicalTokenType.GAP_EVENT)
     CSV_HEADER_FIELDS = ['operation', 'reference_word', 'hypothesis_word', 'events']
+    BACKTRACK_KEYS = {
+        LevenshteinOperation.Type.CORRECT: 'num_cor',
+        LevenshteinOperation.Type.INSERTION: 'num_ins',
+        LevenshteinOperation.Type.DELETION: 'num_del',
+        LevenshteinOperation.Type.SUBSTITUTION: 'num_sub'
+    }
+    OPERATION_PENALTIES = tuple(LevenshteinOperation.Penalty[operation_type.name].value for operation_type in
+                                LevenshteinOperation.Type)
 
     def __init__(self, canonical_references: Iterable[str], canonical_hypotheses: Iterable[str],
-                 evaluator_configuration: Mapping[str, Any] = None):
-        super().__init__(canonical_references, canonical_hypotheses)
-        self._config = utilities.load_configuration_section(self._get_configuration_section())
-        self._evaluator_configuration = evaluator_configuration
+                 evaluator_configuration: Mapping[str, Any] = None, vocabulary: alignment.Vocabulary = None,
+                 alignment_configuration: Mapping[str, Any] = None,
+                 computation_configuration: Mapping[str, Any] = None, metrics_configuration: Mapping[str, Any] = None):
+        super().__init__(canonical_references, canonical_hypotheses, vocabulary, computation_configuration)
+        self._config = metrics_configuration if metrics_configuration else \
+            utilities.load_configuration_section(self._get_configuration_section())
+        self._evaluator_configuration = evaluator_configuration if evaluator_configuration else \
+            utilities.load_configuration_section(ConfigSections.EVALUATOR)
+        self._alignment_config = alignment_configuration if alignment_configuration else \
+            utilities.load_configuration_section(ConfigSections.ALIGNMENT)
+        self._batch_edit_scripts = dict()
+        self._operations_factory = ConfusionMatrix
+        if self._computation_config[Computation.OPERATIONS_SKETCH_SIZE] or \
+                self._computation_config[Computation.OPERATIONS_SKETCH_MAXIMUM_ERROR]:
+            # Operations groups keep only their heavy hitters, with bounded memory
+            self._operations_factory = functools.partial(
+                HeavyHittersSketch, self._computation_config[Computation.OPERATIONS_SKETCH_SIZE],
+                self._computation_config[Computation.OPERATIONS_SKETCH_MAXIMUM_ERROR])
+        self._file_name = None
+        self._file_records = None
+        self._alignment_cache = None
+        self._alignment_cache_misses = dict()
+        self._alignment_cache_statistics = collections.Counter()
+        self._alignment_cache_start_statistics = (0, 0)
+        if self._alignment_config[Alignment.CACHE_PATH]:
+            self._alignment_cache = alignment.AlignmentCache(self._alignment_config[Alignment.CACHE_PATH],
+                                                             self._alignment_config[Alignment.CACHE_MAXIMUM_ENTRIES])
+            # Cached edit scripts are valid only for the evaluator configuration that produced their words
+            self._alignment_cache_namespace = repr(sorted(self._evaluator_configuration.items())).encode()
+
+    def _get_worker_arguments(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        worker_arguments = dict(super()._get_worker_arguments())
+        worker_arguments.update(evaluator_configuration=self._evaluator_configuration,
+                                alignment_configuration=self._alignment_config, metrics_configuration=self._config)
+        return worker_arguments
 
-    def _get_corpus_metrics(self, files_metrics: Mapping[str, Any]) -> Mapping[str, Any]:
+    def _collect_file_metrics(self, file_name: str, file_metrics: Mapping[str, Any]) -> None:
+        """ Adds the alignment cache statistics of a file, computed by the process that evaluated it, to the totals. """
+
+        self._alignment_cache_statistics.update(file_metrics.pop('alignment_cache_statistics', dict()))
+
+    def _get_corpus_metrics(self, files_metrics: Mapping[str, Any],
+                            files_aggregates: Mapping[str, GroupedMetricsAggregate]) -> Mapping[str, Any]:
         """ TODO - Function DOC """
 
-        return MetricsCalculator.compute_corpus_metrics(files_metrics)
+        # Files aggregates are merged instead of being rebuilt from the operation names of their metrics
+        corpus_aggregate = GroupedMetricsAggregate(self._operations_factory)
+        for file_name in files_metrics:
+            corpus_aggregate.merge(files_aggregates[file_name])
+        return corpus_aggregate.to_dict()
 
-    def _get_file_metrics(self, utterances_metrics: Mapping[str, Mapping[str, Any]]) -> Mapping[str, Any]:
+    def _get_file_metrics(self, utterances_metrics: Mapping[str, Mapping[str, Any]],
+                          utterances_aggregates: Mapping[str, GlobalMetricsAggregate]) -> \
+            (Mapping[str, Any], GroupedMetricsAggregate):
         """ TODO - Function DOC """
 
-        return MetricsCalculator.compute_file_metrics(utterances_metrics)
+        # Utterances aggregates were built from their backtraces, whose operations are counted by word ids
+        file_aggregate = GroupedMetricsAggregate(self._operations_factory)
+        for utterance_id, utterance_metrics in utterances_metrics.items():
+            file_aggregate.add(utterances_aggregates[utterance_id], utterance_metrics['language'],
+                               utterance_metrics['audio_note'])
+        return file_aggregate.to_dict(), file_aggregate
 
     def _get_utterance_metrics(self, reference: CanonicalUtterance, hypothesis: CanonicalUtterance) \
-            -> Mapping[str, Any]:
+            -> (Mapping[str, Any], GlobalMetricsAggregate):
         """ TODO - Function DOC """
 
         # Reference and hypothesis words initialization
-        original_reference_words = reference.words if reference.words else list()
-        filtered_reference_words = list(reference_word for reference_word in original_reference_words
-                                        if reference_word.type not in TEIFile.TYPE_B_EVENTS)
-        hypothesis_words = hypothesis.words if hypothesis else list()
+        original_reference_words, filtered_reference_words, hypothesis_words = self._get_alignment_words(reference,
+                                                                                                         hypothesis)
 
         utterance_metrics = collections.defaultdict()
         utterance_metrics['language'] = reference.language
         utterance_metrics['audio_note'] = reference.note
 
+        if self._computation_config[Computation.TOTALS_ONLY]:
+            # Only the operations counts of the alignment are needed, so it is not backtraced
+            reference_ids, hypothesis_ids = self._get_alignment_ids(filtered_reference_words, hypothesis_words)
+            operations_counts = alignment.count_operations(reference_ids, hypothesis_ids)
+            totals_backtrace = self._get_totals_backtrace(operations_counts)
+            utterance_metrics['overall_text'] = MetricsCalculator.compute_utterance_metrics(totals_backtrace)
+            utterance_metrics['event_tags'] = collections.defaultdict()
+            return utterance_metrics, GlobalMetricsAggregate.from_backtraces({'overall_backtrace': totals_backtrace},
+                                                                             self._operations_factory)
+
         # Operation matrix compilation
         operation_matrix = self._compile_operation_matrix(original_reference_words, filtered_reference_words,
-                                                          hypothesis_words)
+                                                          hypothesis_words, reference.start_time, reference.end_time)
 
         # Backtrace though the best route and get CSV entries
-        backtraces, csv_lines = self._backtrace_operation_matrix(operation_matrix)
+        backtrace_operations = list(self._get_backtrace_operations(operation_matrix))
+        backtraces, csv_lines = self._backtrace_operation_matrix(backtrace_operations)
         utterance_metrics['csv_lines'] = csv_lines
+        if self._file_records is not None:
+            self._file_records.add_operations(self._file_name, reference.id, reference.language, reference.note,
+                                              reference.speaker_id,
+                                              ((operation.type.value, operation.reference_word.word,
+                                                operation.hypothesis_word.word,
+                                                list(event.type for event in operation.reference_word.events))
+                                               for operation in reversed(backtrace_operations)))
 
         # Compute overall metrics from backtrace
         utterance_metrics['overall_text'] = MetricsCalculator.compute_utterance_metrics(backtraces['overall_backtrace'])
@@ -472,100 +1510,163 @@ class DefaultMetrics(Metrics):
             events_metrics[event_name] = MetricsCalculator.compute_utterance_metrics(event_backtrace)
         utterance_metrics['event_tags'] = events_metrics
 
-        return utterance_metrics
+        return utterance_metrics, GlobalMetricsAggregate.from_backtraces(backtraces, self._operations_factory)
 
     def _get_transcription_evaluator(self):
         """ TODO - Function DOC """
 
         return DefaultMetricsCanonicalEvaluator(self._evaluator_configuration)
 
-    def _process_metrics(self) -> None:
+    def _pre_utterances_metrics_compute(self, file_name: str, references: [CanonicalUtterance],
+                                        hypotheses: [CanonicalUtterance]) -> None:
         """ TODO - Function DOC """
 
-        for file_name, file_metric in self._corpus_metrics['files'].items():
-            # Write CSV backtrace file
-            all_csv_lines = list()
-            for utterance_metric in file_metric['utterances'].values():
-                all_csv_lines.extend(utterance_metric['csv_lines'])
-                del utterance_metric['csv_lines']
+        # Aligned operations of the file are recorded in a columnar store
+        self._file_name = file_name
+        self._file_records = records.AlignmentRecords() if self._computation_config[Computation.RECORDS] and \
+            not self._computation_config[Computation.TOTALS_ONLY] else None
+        # When a file has many short utterances, they are aligned in batches before computing their metrics
+        self._batch_edit_scripts = dict()
+        self._alignment_cache_misses = dict()
+        if self._alignment_cache:
+            self._alignment_cache_start_statistics = (self._alignment_cache.hits, self._alignment_cache.misses)
+        batch_maximum_length = self._alignment_config[Alignment.BATCH_MAXIMUM_LENGTH]
+        if batch_maximum_length <= 0 or self._computation_config[Computation.TOTALS_ONLY]:
+            return
+        short_pairs = dict()
+        cache_keys = dict()
+        for reference, hypothesis in zip(references, hypotheses):
+            original_reference_words, filtered_reference_words, hypothesis_words = self._get_alignment_words(
+                reference, hypothesis)
+            if len(filtered_reference_words) <= batch_maximum_length and len(hypothesis_words) <= batch_maximum_length:
+                reference_ids, hypothesis_ids = self._get_alignment_ids(filtered_reference_words, hypothesis_words)
+                pair_key = (reference_ids.tobytes(), hypothesis_ids.tobytes())
+                if pair_key in short_pairs or pair_key in self._batch_edit_scripts:
+                    continue
+                if self._alignment_cache:
+                    # Cached edit scripts don't need to be aligned again
+                    cache_key = self._get_alignment_cache_key(original_reference_words, filtered_reference_words,
+                                                              hypothesis_words)
+                    edit_script = self._alignment_cache.get(cache_key)
+                    if edit_script is not None:
+                        self._batch_edit_scripts[pair_key] = edit_script
+                        continue
+                    cache_keys[pair_key] = cache_key
+                short_pairs[pair_key] = (reference_ids, hypothesis_ids)
+        if len(short_pairs) < self._alignment_config[Alignment.BATCH_MINIMUM_UTTERANCES]:
+            # Pairs already missed in the cache are aligned one by one without looking them up again
+            self._alignment_cache_misses = cache_keys
+            return
+        # Pairs of similar length are batched together to reduce padding
+        sorted_pairs = sorted(short_pairs.items(), key=lambda item: len(item[1][0]) + len(item[1][1]))
+        batch_size = self._alignment_config[Alignment.BATCH_SIZE]
+        for batch_start in range(0, len(sorted_pairs), batch_size):
+            batch_pairs = sorted_pairs[batch_start:batch_start + batch_size]
+            batch_edit_scripts = alignment.align_batch(list(ids[0] for _, ids in batch_pairs),
+                                                       list(ids[1] for _, ids in batch_pairs))
+            for (pair_key, _), edit_script in zip(batch_pairs, batch_edit_scripts):
+                self._batch_edit_scripts[pair_key] = edit_script
+                if pair_key in cache_keys:
+                    self._alignment_cache.put(cache_keys[pair_key], edit_script)
+
+    def _process_file_metrics(self, file_name: str, file_metrics: Mapping[str, Any]) -> None:
+        """ TODO - Function DOC """
+
+        # Write new alignments to the cache
+        if self._alignment_cache:
+            self._alignment_cache.flush()
+        # Write CSV backtrace file
+        all_csv_lines = list()
+        for utterance_metric in file_metrics['utterances'].values():
+            all_csv_lines.extend(utterance_metric.pop('csv_lines', list()))
+        if not self._computation_config[Computation.TOTALS_ONLY]:
             utilities.write_local_csv_file(self._get_backtrace_output_file_path(file_name), self.CSV_HEADER_FIELDS,
                                            all_csv_lines)
-        # Write JSON corpus metrics report file
-        utilities.write_local_file(self._get_metrics_output_file_path(), json.dumps(self._corpus_metrics, indent=4))
+        # Write aligned operations records file
+        if self._file_records is not None:
+            self._file_records.save(self._get_records_output_file_path(file_name))
+            self._file_records = None
+        # Write file metrics report file and keep only the file aggregates in memory
+        if self._computation_config[Computation.STREAMING]:
+            self._write_metrics_report(self._get_file_metrics_output_file_path(file_name), file_metrics)
+            del file_metrics['utterances']
+        # Return the alignment cache statistics to the main process, which collects them
+        if self._alignment_cache:
+            start_hits, start_misses = self._alignment_cache_start_statistics
+            file_metrics['alignment_cache_statistics'] = {'hits': self._alignment_cache.hits - start_hits,
+                                                          'misses': self._alignment_cache.misses - start_misses}
 
-    def _backtrace_operation_matrix(self, operation_matrix: [[LevenshteinOperation]]) -> (Mapping[str, Any], [[str]]):
+    def _process_metrics(self) -> None:
         """ TODO - Function DOC """
 
-        # Initialize backtraces
-        overall_backtrace = {
-            'totals': collections.defaultdict(int),
-            'operations_groups': {operation_type.value: LevenshteinOperationGroup(operation_type) for operation_type
-                                  in LevenshteinOperation.Type}
-        }
-        event_tags_backtrace = collections.defaultdict(
-            lambda: {
-                'totals': collections.defaultdict(int),
-                'operations_groups': {operation_type.value: LevenshteinOperationGroup(operation_type) for operation_type
-                                      in LevenshteinOperation.Type}
-            }
-        )
-        no_event_tags_backtrace = {
-            'totals': collections.defaultdict(int),
-            'operations_groups': {operation_type.value: LevenshteinOperationGroup(operation_type) for operation_type
-                                  in LevenshteinOperation.Type}
-        }
+        if self._alignment_cache:
+            print('Alignment cache: {} hits, {} misses'.format(self._alignment_cache_statistics['hits'],
+                                                                self._alignment_cache_statistics['misses']))
+        # Write corpus metrics report file
+        self._write_metrics_report(self._get_metrics_output_file_path(), self._corpus_metrics)
+        # Write corpus aligned operations records file
+        if self._computation_config[Computation.RECORDS] and not self._computation_config[Computation.TOTALS_ONLY]:
+            corpus_records = records.AlignmentRecords()
+            for file_name in self._corpus_metrics['files']:
+                corpus_records.extend(records.AlignmentRecords.load(self._get_records_output_file_path(file_name)))
+            corpus_records.save(self._get_records_output_file_path('Corpus'))
+
+    def _backtrace_operation_matrix(self, operations: [LevenshteinOperation]) -> (Mapping[str, Any], [[str]]):
+        """ TODO - Function DOC """
 
-        # Populate backtraces
-        i = len(operation_matrix) - 1
-        j = len(operation_matrix[0]) - 1
+        # Initialize backtraces
+        overall_backtrace = self._get_empty_backtrace()
+        event_tags_backtrace = collections.defaultdict(self._get_empty_backtrace)
+        no_event_tags_backtrace = self._get_empty_backtrace()
+
+        # Encode the events of each reference word once as a bitmask with one bit per event type. A word can carry
+        # the same event more than once: its repeated occurrences are kept apart since each one is counted
+        operations_codes = np.fromiter((operation.type.value for operation in operations), dtype=np.int8,
+                                       count=len(operations))
+        events_masks = list()
+        events_bits = dict()
+        repeated_operations = list()
+        repeated_bits = list()
+        for operation_index, operation in enumerate(operations):
+            events_mask = 0
+            for operation_event in operation.reference_word.events:
+                event_bit = events_bits.setdefault(operation_event.type, len(events_bits))
+                if events_mask & (1 << event_bit):
+                    repeated_operations.append(operation_index)
+                    repeated_bits.append(event_bit)
+                events_mask |= 1 << event_bit
+            events_masks.append(events_mask)
+
+        # Populate backtraces totals counting the operations codes of each scope, selected by bitmask tests
+        operations_count = len(LevenshteinOperation.Type)
+        events_masks = np.array(events_masks, dtype=np.uint64)
+        tagged_operations = events_masks != 0
+        self._set_backtrace_totals(overall_backtrace, np.bincount(operations_codes, minlength=operations_count))
+        self._set_backtrace_totals(no_event_tags_backtrace, np.bincount(operations_codes[~tagged_operations],
+                                                                        minlength=operations_count))
+        if events_bits:
+            self._set_backtrace_totals(event_tags_backtrace['all'], np.bincount(operations_codes[tagged_operations],
+                                                                                minlength=operations_count))
+            repeated_counts = np.bincount(np.array(repeated_bits, dtype=np.int64) * operations_count +
+                                          operations_codes[repeated_operations],
+                                          minlength=len(events_bits) * operations_count)
+            for event_name, event_bit in events_bits.items():
+                event_operations = np.bitwise_and(events_masks, np.uint64(1 << event_bit)) != 0
+                self._set_backtrace_totals(event_tags_backtrace[event_name],
+                                           np.bincount(operations_codes[event_operations], minlength=operations_count)
+                                           + repeated_counts[event_bit * operations_count:
+                                                             (event_bit + 1) * operations_count])
+
+        # Populate backtraces operations groups and CSV lines
         csv_lines = list()
-        while i > 0 or j > 0:
-            operation = operation_matrix[i][j]
-            if operation.type == LevenshteinOperation.Type.CORRECT:
-                backtrack_key = 'num_cor'
-                i -= 1
-                j -= 1
-            elif operation.type == LevenshteinOperation.Type.SUBSTITUTION:
-                backtrack_key = 'num_sub'
-                i -= 1
-                j -= 1
-            elif operation.type == LevenshteinOperation.Type.INSERTION:
-                backtrack_key = 'num_ins'
-                j -= 1
-            elif operation.type == LevenshteinOperation.Type.DELETION:
-                backtrack_key = 'num_del'
-                i -= 1
-            else:
-                raise ValueError('Operation type {} not valid'.format(operation.type))
-
-            # Populate overall backtrace
-            overall_backtrace['totals'][backtrack_key] += 1
-            if operation.type != LevenshteinOperation.Type.INSERTION:
-                overall_backtrace['totals']['ref_len'] += 1
-                overall_backtrace['totals']['hyp_len'] += 1
+        for operation, tagged_operation in zip(operations, tagged_operations.tolist()):
             overall_backtrace['operations_groups'][operation.type.value].add(operation)
-            operation_events = operation.reference_word.events
-            if not operation_events:
-                # Populate no event tags backtrace
-                no_event_tags_backtrace['totals'][backtrack_key] += 1
-                if operation.type != LevenshteinOperation.Type.INSERTION:
-                    no_event_tags_backtrace['totals']['ref_len'] += 1
-                    no_event_tags_backtrace['totals']['hyp_len'] += 1
+            if not tagged_operation:
                 no_event_tags_backtrace['operations_groups'][operation.type.value].add(operation)
             else:
-                # Populate event tags backtrace: increment 'all' key once then iterate over all events
-                event_tags_backtrace['all']['totals'][backtrack_key] += 1
-                if operation.type != LevenshteinOperation.Type.INSERTION:
-                    event_tags_backtrace['all']['totals']['ref_len'] += 1
-                    event_tags_backtrace['all']['totals']['hyp_len'] += 1
                 event_tags_backtrace['all']['operations_groups'][operation.type.value].add(operation)
-                for operation_event in operation_events:
-                    event_tags_backtrace[operation_event.type]['totals'][backtrack_key] += 1
-                    if operation.type != LevenshteinOperation.Type.INSERTION:
-                        event_tags_backtrace[operation_event.type]['totals']['ref_len'] += 1
-                        event_tags_backtrace[operation_event.type]['totals']['hyp_len'] += 1
+                for operation_event in operation.reference_word.events:
                     event_tags_backtrace[operation_event.type]['operations_groups'][operation.type.value].add(operation)
-            # Populate CSV lines
             csv_lines.append(self._get_operation_csv_row(operation))
 
         # Build backtraces dictionary
@@ -579,71 +1680,197 @@ class DefaultMetrics(Metrics):
 
     def _compile_operation_matrix(self, original_reference_words: [CanonicalToken],
                                   filtered_reference_words: [CanonicalToken],
-                                  hypothesis_words: [CanonicalToken]) -> [[LevenshteinOperation]]:
-        """ TODO - Function DOC """
-
-        # Operation matrix initialization
-        op_matrix_rows_num = len(filtered_reference_words) + 1
-        op_matrix_cols_num = len(hypothesis_words) + 1
-        op_matrix = np.array([[LevenshteinOperation() for _ in range(op_matrix_cols_num)]
-                              for _ in range(op_matrix_rows_num)])
-
-        # Compilation
-        # First column represents the case where we achieve zero hypothesis words by deleting all reference words.
-        for i in range(1, op_matrix_rows_num):
-            reference_word = self._get_reference_word(original_reference_words[i - 1], filtered_reference_words[i - 1],
-                                                      LevenshteinOperation.Type.DELETION)
-            op_matrix[i][0] = LevenshteinOperation(reference_word=reference_word,
-                                                   hypothesis_word=CanonicalToken(word=None),
-                                                   operation_type=LevenshteinOperation.Type.DELETION,
-                                                   operation_cost=LevenshteinOperation.Penalty.DELETION.value * i)
-        # First row represents the case where we achieve the hypothesis by inserting all hypothesis words into a
-        # zero-length reference.
-        for j in range(1, op_matrix_cols_num):
-            reference_word = CanonicalToken(word=None) if not original_reference_words else original_reference_words[0]
-            op_matrix[0][j] = LevenshteinOperation(reference_word=reference_word,
-                                                   hypothesis_word=hypothesis_words[j - 1],
-                                                   operation_type=LevenshteinOperation.Type.INSERTION,
-                                                   operation_cost=LevenshteinOperation.Penalty.INSERTION.value * j)
-        # Levenshtein distance minimization
-        for i in range(1, op_matrix_rows_num):
-            for j in range(1, op_matrix_cols_num):
-                if filtered_reference_words[i - 1].word == hypothesis_words[j - 1].word:
-                    operation_type = LevenshteinOperation.Type.CORRECT
-                    operation_cost = op_matrix[i - 1][j - 1].cost
-                    reference_word = filtered_reference_words[i - 1]
-                    hypothesis_word = hypothesis_words[j - 1]
-                else:
-                    substitution_cost = op_matrix[i - 1][j - 1].cost + LevenshteinOperation.Penalty.SUBSTITUTION.value
-                    insertion_cost = op_matrix[i][j - 1].cost + LevenshteinOperation.Penalty.INSERTION.value
-                    deletion_cost = op_matrix[i - 1][j].cost + LevenshteinOperation.Penalty.DELETION.value
-                    operation_cost = min(substitution_cost, insertion_cost, deletion_cost)
-                    # Order of case is important here: if there's an equal cost we always prefer insertions/deletions
-                    # to substitutions
-                    if operation_cost == insertion_cost:
-                        operation_type = LevenshteinOperation.Type.INSERTION
-                        hypothesis_word = hypothesis_words[j - 1]
-                    elif operation_cost == deletion_cost:
-                        operation_type = LevenshteinOperation.Type.DELETION
-                        hypothesis_word = CanonicalToken(word=None)
-                    else:
-                        operation_type = LevenshteinOperation.Type.SUBSTITUTION
-                        hypothesis_word = hypothesis_words[j - 1]
-                    reference_word = self._get_reference_word(original_reference_words[i - 1],
-                                                              filtered_reference_words[i - 1], operation_type)
-                op_matrix[i][j] = LevenshteinOperation(reference_word, hypothesis_word, operation_type, operation_cost)
-
-        return op_matrix
+                                  hypothesis_words: [CanonicalToken], reference_start_time: float = 0.0,
+                                  reference_end_time: float = 0.0) -> LevenshteinAlignment:
+        """ TODO - Function DOC """
+
+        # Map words to their vocabulary ids so that the alignment kernel compares integers
+        reference_ids, hypothesis_ids = self._get_alignment_ids(filtered_reference_words, hypothesis_words)
+
+        # Utterances already aligned in a batch or found in the alignment cache are not aligned again
+        pair_key = (reference_ids.tobytes(), hypothesis_ids.tobytes())
+        edit_script = self._batch_edit_scripts.get(pair_key)
+        if edit_script is None and self._alignment_cache:
+            cache_key = self._alignment_cache_misses.pop(pair_key, None)
+            if cache_key is None:
+                cache_key = self._get_alignment_cache_key(original_reference_words, filtered_reference_words,
+                                                          hypothesis_words)
+                edit_script = self._alignment_cache.get(cache_key)
+            if edit_script is None:
+                edit_script = self._align_ids(reference_ids, hypothesis_ids, hypothesis_words, reference_start_time,
+                                              reference_end_time)
+                self._alignment_cache.put(cache_key, edit_script)
+        elif edit_script is None:
+            edit_script = self._align_ids(reference_ids, hypothesis_ids, hypothesis_words, reference_start_time,
+                                          reference_end_time)
+
+        return LevenshteinAlignment(edit_script, original_reference_words, filtered_reference_words, hypothesis_words)
+
+    def _align_ids(self, reference_ids: np.ndarray, hypothesis_ids: np.ndarray, hypothesis_words: [CanonicalToken],
+                   reference_start_time: float, reference_end_time: float) -> np.ndarray:
+        """ TODO - Function DOC """
+
+        # Levenshtein distance minimization: only the int8 operation of each cell is kept. If enabled, only the cells
+        # inside a band are evaluated, falling back to the full matrix when the band can't contain an optimal path.
+        edit_script = None
+        if self._alignment_config[Alignment.BAND_MODE]:
+            band_starts, band_ends = self._get_alignment_band(len(reference_ids), hypothesis_words,
+                                                              reference_start_time, reference_end_time)
+            edit_script = alignment.align_banded(reference_ids, hypothesis_ids, band_starts, band_ends)
+        # Above the threshold the alignment is computed in linear space, giving the same edit script
+        linear_space_threshold = self._alignment_config[Alignment.LINEAR_SPACE_THRESHOLD]
+        if edit_script is None and len(reference_ids) * len(hypothesis_ids) > linear_space_threshold:
+            edit_script = alignment.align_linear_space(reference_ids, hypothesis_ids, linear_space_threshold)
+        elif edit_script is None:
+            edit_script = alignment.align(reference_ids, hypothesis_ids)
+        return edit_script
+
+    def _get_alignment_cache_key(self, original_reference_words: [CanonicalToken],
+                                 filtered_reference_words: [CanonicalToken],
+                                 hypothesis_words: [CanonicalToken]) -> bytes:
+        """ TODO - Function DOC """
+
+        # Words are hashed as strings since their vocabulary ids change from one run to another
+        cache_key = hashlib.sha256(self._alignment_cache_namespace)
+        for words in (original_reference_words, filtered_reference_words, hypothesis_words):
+            cache_key.update(b'\x1e')
+            for word in words:
+                cache_key.update(word.word.encode())
+                cache_key.update(b'\x1f')
+                cache_key.update(','.join(event.type for event in word.events).encode())
+                cache_key.update(b'\x1f')
+        return cache_key.digest()
+
+    def _get_alignment_ids(self, filtered_reference_words: [CanonicalToken], hypothesis_words: [CanonicalToken]) -> \
+            (np.ndarray, np.ndarray):
+        """ TODO - Function DOC """
+
+        reference_ids = self._vocabulary.intern_words((word.word for word in filtered_reference_words),
+                                                      len(filtered_reference_words))
+        hypothesis_ids = self._vocabulary.intern_words((word.word for word in hypothesis_words), len(hypothesis_words))
+        return reference_ids, hypothesis_ids
+
+    @staticmethod
+    def _get_alignment_words(reference: CanonicalUtterance, hypothesis: CanonicalUtterance) -> \
+            ([CanonicalToken], [CanonicalToken], [CanonicalToken]):
+        """ TODO - Function DOC """
+
+        original_reference_words = reference.words if reference.words else list()
+        filtered_reference_words = list(reference_word for reference_word in original_reference_words
+                                        if reference_word.type not in TEIFile.TYPE_B_EVENTS)
+        hypothesis_words = hypothesis.words if hypothesis else list()
+        return original_reference_words, filtered_reference_words, hypothesis_words
+
+    def _get_alignment_band(self, reference_len: int, hypothesis_words: [CanonicalToken], reference_start_time: float,
+                            reference_end_time: float) -> (np.ndarray, np.ndarray):
+        """ TODO - Function DOC """
+
+        band_mode = self._alignment_config[Alignment.BAND_MODE]
+        band_width = self._alignment_config[Alignment.BAND_WIDTH]
+        if band_mode == Alignment.TIMESTAMPS_BAND and reference_end_time > reference_start_time:
+            hypothesis_times = np.fromiter(((word.start_time + word.end_time) / 2 for word in hypothesis_words),
+                                           dtype=np.float64, count=len(hypothesis_words))
+            return alignment.timestamps_band(hypothesis_times, reference_len, reference_start_time,
+                                             reference_end_time, band_width)
+        elif band_mode in (Alignment.TIMESTAMPS_BAND, Alignment.DIAGONAL_BAND):
+            return alignment.diagonal_band(reference_len, len(hypothesis_words), band_width)
+        else:
+            raise ValueError('Alignment band mode {} not valid.'.format(band_mode))
+
+    def _get_backtrace_operations(self, operation_matrix: LevenshteinAlignment) -> Iterator[LevenshteinOperation]:
+        """ Materializes the operations of an alignment, from the last aligned word back to the first one. """
+
+        original_reference_words = operation_matrix.original_reference_words
+        filtered_reference_words = operation_matrix.filtered_reference_words
+        hypothesis_words = operation_matrix.hypothesis_words
+        edit_operations = operation_matrix.edit_script.tolist()
+        i = len(edit_operations) - edit_operations.count(alignment.EditOperation.INSERTION)
+        j = len(edit_operations) - edit_operations.count(alignment.EditOperation.DELETION)
+        operation_cost = sum(self.OPERATION_PENALTIES[edit_operation] for edit_operation in edit_operations)
+        for edit_operation in reversed(edit_operations):
+            operation_type = LevenshteinOperation.Type(edit_operation)
+            if operation_type == LevenshteinOperation.Type.CORRECT:
+                reference_word = filtered_reference_words[i - 1]
+                hypothesis_word = hypothesis_words[j - 1]
+            elif i == 0:
+                # First row represents the case where we achieve the hypothesis by inserting all hypothesis words
+                # into a zero-length reference.
+                reference_word = CanonicalToken(word=None) if not original_reference_words else \
+                    original_reference_words[0]
+                hypothesis_word = hypothesis_words[j - 1]
+            else:
+                reference_word = self._get_reference_word(original_reference_words[i - 1],
+                                                          filtered_reference_words[i - 1], operation_type)
+                hypothesis_word = CanonicalToken(word=None) if operation_type == LevenshteinOperation.Type.DELETION \
+                    else hypothesis_words[j - 1]
+            yield LevenshteinOperation(reference_word, hypothesis_word, operation_type, operation_cost)
+            operation_cost -= self.OPERATION_PENALTIES[edit_operation]
+            if operation_type != LevenshteinOperation.Type.INSERTION:
+                i -= 1
+            if operation_type != LevenshteinOperation.Type.DELETION:
+                j -= 1
+
+    def _get_empty_backtrace(self) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        return {
+            'totals': collections.defaultdict(int),
+            'operations_groups': {operation_type.value: LevenshteinOperationGroup(operation_type, self._vocabulary)
+                                  for operation_type in LevenshteinOperation.Type}
+        }
+
+    def _get_totals_backtrace(self, operations_counts: np.ndarray) -> Mapping[str, Any]:
+        """ TODO - Function DOC """
+
+        totals_backtrace = self._get_empty_backtrace()
+        self._set_backtrace_totals(totals_backtrace, operations_counts)
+        return totals_backtrace
+
+    def _set_backtrace_totals(self, backtrace: Mapping[str, Any], operations_counts: np.ndarray) -> None:
+        """ Sets the totals of a backtrace from the number of its operations of each type, indexed by code. """
+
+        for operation_type, backtrack_key in self.BACKTRACK_KEYS.items():
+            backtrace['totals'][backtrack_key] = int(operations_counts[operation_type.value])
+        # As in the backtrace, reference and hypothesis lengths count the operations that are not insertions
+        aligned_len = sum(backtrace['totals'][backtrack_key] for operation_type, backtrack_key in
+                          self.BACKTRACK_KEYS.items() if operation_type != LevenshteinOperation.Type.INSERTION)
+        backtrace['totals']['ref_len'] = aligned_len
+        backtrace['totals']['hyp_len'] = aligned_len
 
     def _get_backtrace_output_file_path(self, file_name: str) -> str:
         """ TODO - Function DOC """
 
         return '{}/{}_Backtrace.csv'.format(self._config[Paths.REPORT_OUTPUT_PATH], file_name)
 
+    def _get_file_metrics_output_file_path(self, file_name: str) -> str:
+        """ TODO - Function DOC """
+
+        return '{}/{}_Metrics.{}'.format(self._config[Paths.REPORT_OUTPUT_PATH], file_name,
+                                         self._get_metrics_report_extension())
+
+    def _get_records_output_file_path(self, file_name: str) -> str:
+        """ TODO - Function DOC """
+
+        return '{}/{}_Records.npz'.format(self._config[Paths.REPORT_OUTPUT_PATH], file_name)
+
     def _get_metrics_output_file_path(self) -> str:
         """ TODO - Function DOC """
 
-        return '{}/Corpus_Metrics.json'.format(self._config[Paths.REPORT_OUTPUT_PATH])
+        return '{}/Corpus_Metrics.{}'.format(self._config[Paths.REPORT_OUTPUT_PATH],
+                                             self._get_metrics_report_extension())
+
+    def _get_metrics_report_extension(self) -> str:
+        """ Returns the extension of the metrics report files of the configured report format. """
+
+        return 'pb' if self._computation_config[Computation.REPORT_FORMAT] == Computation.BINARY_REPORT else 'json'
+
+    def _write_metrics_report(self, file_path: str, metrics: Mapping[str, Any]) -> None:
+        """ Writes a file or corpus metrics report in the configured report format. """
+
+        if self._computation_config[Computation.REPORT_FORMAT] == Computation.BINARY_REPORT:
+            MetricsReport.write(file_path, metrics)
+        else:
+            utilities.write_local_file(file_path, json.dumps(metrics, indent=4))
 
     @classmethod
     def _get_operation_csv_row(cls, operation: LevenshteinOperation) -> [str]:
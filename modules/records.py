@@ -0,0 +1,250 @@
+""" Columnar store of the aligned operations of a corpus evaluation.
+
+Every aligned operation is a row of a NumPy structured array. Strings are not stored in the rows: file names,
+utterance ids, languages, audio notes and speakers are indexes into label tables, words are ids of a vocabulary and
+the event tags of the reference word are the bits of a mask, one bit for each event name. Since a word can carry the
+same event more than once, each event occurrence is also stored in a second array that refers to its record.
+Aggregates are computed with vectorized group-by operations over the columns.
+
+"""
+
+from __future__ import annotations
+import numpy as np
+from typing import Iterable, Mapping
+from modules import alignment
+
+
+class AlignmentRecords:
+    """ TODO - Class DOC """
+
+    LABEL_COLUMNS = ('file', 'utterance', 'language', 'audio_note', 'speaker')
+    RECORD_DTYPE = np.dtype([('file', np.int32), ('utterance', np.int32), ('language', np.int32),
+                             ('audio_note', np.int32), ('speaker', np.int32), ('operation', np.int8),
+                             ('reference_word', np.int32), ('hypothesis_word', np.int32), ('events', np.uint64)])
+    EVENT_OCCURRENCE_DTYPE = np.dtype([('record', np.int64), ('event', np.int8)])
+    OPERATIONS_COUNT = 4
+    MAXIMUM_EVENTS = 64
+
+    def __init__(self):
+        self._labels = {column: alignment.Vocabulary() for column in self.LABEL_COLUMNS}
+        self._vocabulary = alignment.Vocabulary()
+        self._events = dict()
+        self._chunks = list()
+        self._event_occurrences_chunks = list()
+        self._records_count = 0
+
+    def __len__(self) -> int:
+        return self._records_count
+
+    @property
+    def records(self) -> np.ndarray:
+        """ The structured array of the recorded operations, one row per operation. """
+
+        if len(self._chunks) != 1:
+            self._chunks = [np.concatenate(self._chunks) if self._chunks else np.empty(0, dtype=self.RECORD_DTYPE)]
+        return self._chunks[0]
+
+    @property
+    def event_occurrences(self) -> np.ndarray:
+        """ The structured array of the event occurrences, with the index of their record and the bit of their name. """
+
+        if len(self._event_occurrences_chunks) != 1:
+            self._event_occurrences_chunks = [np.concatenate(self._event_occurrences_chunks)
+                                              if self._event_occurrences_chunks else
+                                              np.empty(0, dtype=self.EVENT_OCCURRENCE_DTYPE)]
+        return self._event_occurrences_chunks[0]
+
+    @property
+    def events(self) -> [str]:
+        """ The event names, ordered by their bit in the events mask. """
+
+        return list(self._events)
+
+    def label(self, column: str, label_id: int) -> str:
+        """ Returns the label that was assigned to an id of a label column. """
+
+        return self._labels[column].word(label_id)
+
+    def word(self, word_id: int) -> str:
+        """ Returns the word that was assigned to an id of the word columns. """
+
+        return self._vocabulary.word(word_id)
+
+    def add_operations(self, file_name: str, utterance_id: str, language: str, audio_note: str, speaker: str,
+                       operations: Iterable[(int, str, str, Iterable[str])]) -> None:
+        """Records the aligned operations of an utterance.
+
+        Args:
+            file_name (str):
+                The name of the file of the utterance.
+            utterance_id (str):
+                The id of the utterance.
+            language (str):
+                The language of the utterance.
+            audio_note (str):
+                The audio note of the utterance.
+            speaker (str):
+                The speaker of the utterance.
+            operations (Iterable[(int, str, str, Iterable[str])]):
+                The operation code, reference word, hypothesis word and event names of each operation, in alignment
+                order.
+
+        """
+
+        operations = list(operations)
+        utterance_records = np.empty(len(operations), dtype=self.RECORD_DTYPE)
+        for column, label in zip(self.LABEL_COLUMNS, (file_name, utterance_id, language, audio_note, speaker)):
+            utterance_records[column] = self._labels[column].intern(label)
+        utterance_records['operation'] = list(operation for operation, _, _, _ in operations)
+        utterance_records['reference_word'] = list(self._vocabulary.intern(reference_word)
+                                                   for _, reference_word, _, _ in operations)
+        utterance_records['hypothesis_word'] = list(self._vocabulary.intern(hypothesis_word)
+                                                    for _, _, hypothesis_word, _ in operations)
+        events_bits = list(list(self._get_event_bit(event_name) for event_name in event_names)
+                           for _, _, _, event_names in operations)
+        utterance_records['events'] = list(sum(set(1 << event_bit for event_bit in operation_events_bits))
+                                           for operation_events_bits in events_bits)
+        event_occurrences = np.array(list((self._records_count + record_index, event_bit)
+                                          for record_index, operation_events_bits in enumerate(events_bits)
+                                          for event_bit in operation_events_bits), dtype=self.EVENT_OCCURRENCE_DTYPE)
+        self._append(utterance_records, event_occurrences)
+
+    def extend(self, other: AlignmentRecords) -> None:
+        """ Appends the records of another store, mapping its labels, words and events to the ones of this store. """
+
+        other_records = other.records.copy()
+        for column in self.LABEL_COLUMNS:
+            label_ids = self._get_ids_map(self._labels[column], other._labels[column].words)
+            other_records[column] = label_ids[other_records[column]]
+        word_ids = self._get_ids_map(self._vocabulary, other._vocabulary.words)
+        other_records['reference_word'] = word_ids[other_records['reference_word']]
+        other_records['hypothesis_word'] = word_ids[other_records['hypothesis_word']]
+        event_bits = np.fromiter((self._get_event_bit(event_name) for event_name in other.events), dtype=np.int8,
+                                 count=len(other.events))
+        other_event_occurrences = other.event_occurrences.copy()
+        other_event_occurrences['record'] += self._records_count
+        other_event_occurrences['event'] = event_bits[other_event_occurrences['event']]
+        other_records['events'] = 0
+        np.bitwise_or.at(other_records['events'], other_event_occurrences['record'] - self._records_count,
+                         np.left_shift(np.uint64(1), other_event_occurrences['event'].astype(np.uint64)))
+        self._append(other_records, other_event_occurrences)
+
+    def get_scope_weights(self, scope: str) -> np.ndarray:
+        """Returns how many times each record is counted in a text scope.
+
+        Args:
+            scope (str):
+                'overall_text', 'without_tags_text', 'all' for the words with any event tag or the name of an event.
+                A record is counted once for each occurrence of the event in its reference word.
+
+        Returns:
+            np.ndarray:
+                The int64 weight of each record.
+
+        """
+
+        events_masks = self.records['events']
+        if scope == 'overall_text':
+            return np.ones(len(events_masks), dtype=np.int64)
+        elif scope == 'without_tags_text':
+            return (events_masks == 0).astype(np.int64)
+        elif scope == 'all':
+            return (events_masks != 0).astype(np.int64)
+        elif scope in self._events:
+            event_occurrences = self.event_occurrences
+            scope_occurrences = event_occurrences['record'][event_occurrences['event'] == self._events[scope]]
+            return np.bincount(scope_occurrences, minlength=len(events_masks)).astype(np.int64)
+        else:
+            return np.zeros(len(events_masks), dtype=np.int64)
+
+    def count_operations(self, group_columns: Iterable[str] = (), scope: str = 'overall_text') -> \
+            Mapping[tuple, np.ndarray]:
+        """Counts the operations of each type of the groups of records that share the values of some label columns.
+
+        Args:
+            group_columns (Iterable[str]):
+                The label columns to group by. With no columns, all the records form a single group.
+            scope (str):
+                The text scope of the records to count, as accepted by get_scope_weights.
+
+        Returns:
+            Mapping[tuple, np.ndarray]:
+                The number of operations of each type, indexed by operation code, for the labels of each group.
+
+        """
+
+        group_columns = tuple(group_columns)
+        all_records = self.records
+        weights = self.get_scope_weights(scope)
+        records, weights = all_records[weights > 0], weights[weights > 0]
+        if group_columns:
+            group_keys = np.stack(list(records[column] for column in group_columns), axis=1)
+            group_labels, group_indexes = np.unique(group_keys, axis=0, return_inverse=True)
+            group_indexes = group_indexes.reshape(-1)
+        else:
+            group_labels, group_indexes = np.zeros((1, 0), dtype=np.int32), np.zeros(len(records), dtype=np.int64)
+        counts = np.bincount(group_indexes * self.OPERATIONS_COUNT + records['operation'], weights=weights,
+                             minlength=len(group_labels) * self.OPERATIONS_COUNT)
+        counts = counts.astype(np.int64).reshape(len(group_labels), self.OPERATIONS_COUNT)
+        return {tuple(self.label(column, label_id) for column, label_id in zip(group_columns, labels)): group_counts
+                for labels, group_counts in zip(group_labels.tolist(), counts)}
+
+    def count_confusions(self, operation: int, scope: str = 'overall_text') -> Mapping[(str, str), int]:
+        """ Counts the (reference word, hypothesis word) pairs of the records of an operation type in a text scope. """
+
+        weights = self.get_scope_weights(scope)
+        selected = (self.records['operation'] == operation) & (weights > 0)
+        records, weights = self.records[selected], weights[selected]
+        pairs = records['reference_word'].astype(np.int64) << 32 | records['hypothesis_word'].astype(np.int64)
+        unique_pairs, pair_indexes = np.unique(pairs, return_inverse=True)
+        counts = np.bincount(pair_indexes.reshape(-1), weights=weights, minlength=len(unique_pairs)).astype(np.int64)
+        return {(self.word(int(pair >> 32)), self.word(int(pair & 0xFFFFFFFF))): int(count)
+                for pair, count in zip(unique_pairs, counts)}
+
+    def save(self, file_path: str) -> None:
+        """ Writes the records, the label tables, the words and the event names to an uncompressed .npz file. """
+
+        tables = {'{}_labels'.format(column): np.array(self._labels[column].words, dtype=str)
+                  for column in self.LABEL_COLUMNS}
+        np.savez(file_path, records=self.records, event_occurrences=self.event_occurrences,
+                            words=np.array(self._vocabulary.words, dtype=str), events=np.array(self.events, dtype=str),
+                            **tables)
+
+    @classmethod
+    def load(cls, file_path: str) -> AlignmentRecords:
+        """ Reads the records written by save. """
+
+        alignment_records = cls()
+        with np.load(file_path) as records_file:
+            for column in cls.LABEL_COLUMNS:
+                for label in records_file['{}_labels'.format(column)].tolist():
+                    alignment_records._labels[column].intern(label)
+            for word in records_file['words'].tolist():
+                alignment_records._vocabulary.intern(word)
+            for event_name in records_file['events'].tolist():
+                alignment_records._get_event_bit(event_name)
+            alignment_records._append(records_file['records'], records_file['event_occurrences'])
+        return alignment_records
+
+    def _append(self, records: np.ndarray, event_occurrences: np.ndarray) -> None:
+        """ Appends a chunk of records and the occurrences of their events. """
+
+        self._chunks.append(records)
+        self._event_occurrences_chunks.append(event_occurrences)
+        self._records_count += len(records)
+
+    def _get_event_bit(self, event_name: str) -> int:
+        """ Returns the bit of an event name in the events mask, assigning a new one if the name was never seen. """
+
+        event_bit = self._events.get(event_name)
+        if event_bit is None:
+            if len(self._events) == self.MAXIMUM_EVENTS:
+                raise ValueError('Alignment records support at most {} event names.'.format(self.MAXIMUM_EVENTS))
+            event_bit = self._events[event_name] = len(self._events)
+        return event_bit
+
+    @staticmethod
+    def _get_ids_map(vocabulary: alignment.Vocabulary, words: [str]) -> np.ndarray:
+        """ Returns the array that maps the index of each word to its id in a vocabulary. """
+
+        return vocabulary.intern_words(words, len(words))
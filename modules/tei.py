@@ -1,9 +1,11 @@
 """ TODO - Module DOC """
 
+import os
 import re
 from abc import ABC, abstractmethod
 from enum import Enum
 from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Mapping
 from lxml import etree
 from modules import utilities
 from modules.compiled.canonical_transcription_pb2 import CanonicalToken
@@ -110,14 +112,25 @@ class TEIFile(object):
     TYPE_B_EVENTS = [CanonicalToken.CanonicalTokenType.VOCAL_EVENT, CanonicalToken.CanonicalTokenType.INCIDENT_EVENT,
                      CanonicalToken.CanonicalTokenType.GAP_EVENT]
 
-    def __init__(self, file_path: str):
+    # Compiled schemas of the process, by XSD file path and modification time
+    _schemas = dict()
+
+    def __init__(self, file_path: str, streaming: bool = False):
         self._file_path = file_path
         self._words_counter = 0
-        self._parser = TEIParser(self)
+        self._streaming = streaming
+        self._parser = TEIParser(self, streaming)
         self._languages = self._parser.parse_lang_usage()
         self._speakers = self._parser.parse_partic_desc()
         self._timeline = self._parser.parse_timeline()
-        self._utterances = self._parser.parse_body()
+        # Lookups by id are resolved with indexes, keeping the first of any duplicated id
+        self._languages_index = self._get_index(self._languages, lambda language: language.code)
+        self._speakers_index = self._get_index(self._speakers, lambda speaker: speaker.id)
+        self._time_intervals_index = self._get_index(range(len(self._timeline.intervals)),
+                                                     lambda index: self._timeline.intervals[index].id)
+        self._absolute_times = self._get_absolute_times()
+        # When streaming, utterances are parsed only while they are iterated
+        self._utterances = None if streaming else self._parser.parse_body()
 
     @property
     def file_path(self) -> str:
@@ -159,23 +172,51 @@ class TEIFile(object):
     def utterances(self) -> [Utterance]:
         """ TODO - Function DOC """
 
+        if self._utterances is None:
+            self._utterances = list(self.iter_utterances())
         return self._utterances
 
+    def iter_utterances(self) -> Iterator[Utterance]:
+        """Iterates over the utterances of the file.
+
+        When streaming, each utterance is parsed from its annotation block as soon as it is requested and the block is
+        then discarded, so the document is never held in memory as a whole. Words counts are computed again at every
+        iteration and are complete only when it ends.
+
+        Yields:
+            Utterance:
+                The utterances, in document order.
+
+        """
+
+        if self._utterances is not None:
+            yield from self._utterances
+            return
+        self._words_counter = 0
+        for language in self._languages:
+            language.words_count = 0
+        yield from self._parser.iter_body()
+
     def get_language_by_code(self, language_code: str) -> Language:
         """ TODO - Function DOC """
 
-        return next((language for language in self._languages if language.code == language_code), self.DEFAULT_LANGUAGE)
+        return self._languages_index.get(language_code, self.DEFAULT_LANGUAGE)
 
     def get_speaker_by_id(self, speaker_id: str) -> Person:
         """ TODO - Function DOC """
 
-        return next((speaker for speaker in self._speakers if speaker.id == speaker_id), None)
+        return self._speakers_index.get(speaker_id)
 
     def get_time_interval_by_id(self, time_interval_id: str) -> TimeInterval:
         """ TODO - Function DOC """
 
-        return next((time_interval for time_interval in self._timeline.intervals if time_interval.id ==
-                     time_interval_id), None)
+        time_interval_index = self._time_intervals_index.get(time_interval_id)
+        return self._timeline.intervals[time_interval_index] if time_interval_index is not None else None
+
+    def get_absolute_time_by_id(self, time_interval_id: str) -> float:
+        """ Returns the time of a timeline point from the start of the timeline, following its 'since' references. """
+
+        return self._absolute_times[self._time_intervals_index[time_interval_id]]
 
     def increment_language_words_counter(self, language_code: str, increment: int) -> None:
         """ TODO - Function DOC """
@@ -188,14 +229,55 @@ class TEIFile(object):
 
         self._words_counter += increment
 
+    def _get_absolute_times(self) -> [float]:
+        """ Resolves the time of each timeline point, indexed as the timeline intervals. A point without a known
+        reference is relative to the start of the timeline. """
+
+        intervals = self._timeline.intervals
+        absolute_times = [None] * len(intervals)
+        for interval_index in range(len(intervals)):
+            # Follow the references up to a resolved point, then resolve the chain backwards
+            references_chain = list()
+            reference_index = interval_index
+            while reference_index is not None and absolute_times[reference_index] is None and \
+                    reference_index not in references_chain:
+                references_chain.append(reference_index)
+                reference_index = self._time_intervals_index.get(intervals[reference_index].reference.lstrip('#'))
+            reference_time = absolute_times[reference_index] if reference_index is not None and \
+                absolute_times[reference_index] is not None else 0.0
+            for chain_index in reversed(references_chain):
+                reference_time = absolute_times[chain_index] = intervals[chain_index].interval + reference_time
+        return absolute_times
+
+    @staticmethod
+    def _get_index(items: Iterable, get_key: Callable) -> Mapping:
+        """ Returns the dictionary of the items by key, keeping the first item of each key. """
+
+        index = dict()
+        for item in items:
+            index.setdefault(get_key(item), item)
+        return index
+
     def validate(self) -> (bool, property):
         """ TODO - Function DOC """
 
-        validator = etree.XMLSchema(file=tei_config[TEI.XSD_SCHEMA_PATH])
-        validation_result = validator.validate(etree.parse(self._file_path))
+        validator = self._get_schema(tei_config[TEI.XSD_SCHEMA_PATH])
+        # The tree already parsed is validated, unless it was streamed
+        tei_file_tree = self._parser.tree if self._parser.tree is not None else etree.parse(self._file_path)
+        validation_result = validator.validate(tei_file_tree)
 
         return validation_result, validator.error_log
 
+    @classmethod
+    def _get_schema(cls, xsd_schema_path: str) -> etree.XMLSchema:
+        """ Returns the compiled schema of an XSD file, compiling it again only if the file was modified. """
+
+        schema_key = (os.path.abspath(xsd_schema_path), os.path.getmtime(xsd_schema_path))
+        schema = cls._schemas.get(schema_key)
+        if schema is None:
+            schema = cls._schemas[schema_key] = etree.XMLSchema(file=xsd_schema_path)
+        return schema
+
 
 class TEIParser(object):
     """ TODO - Class DOC """
@@ -212,10 +294,11 @@ class TEIParser(object):
             non_event_words: [str]
             sub_events: ['TEIParser.EventParser.ParsedEvent']
 
-        def __init__(self, event_tag: str, event_element: etree.Element, annotation_block_element: etree.Element):
+        def __init__(self, event_tag: str, event_element: etree.Element,
+                     overlap_utterances_index: Mapping[str, etree.Element]):
             self._event_tag = event_tag
             self._event_element = event_element
-            self._annotation_block_element = annotation_block_element
+            self._overlap_utterances_index = overlap_utterances_index
 
         def parse_event(self) -> ParsedEvent:
             """ TODO - Function DOC """
@@ -241,7 +324,7 @@ class TEIParser(object):
         def _parse_sub_events(self) -> [ParsedEvent]:
             """ TODO - Function DOC """
 
-            return list(TEIParser._parse_event(sub_event_element, self._annotation_block_element) for sub_event_element
+            return list(TEIParser._parse_event(sub_event_element, self._overlap_utterances_index) for sub_event_element
                         in self._event_element)
 
         def _get_words_from_element_text(self) -> [str]:
@@ -368,6 +451,23 @@ class TEIParser(object):
     class AnchorEventParser(EventParser):
         """ TODO - Class DOC """
 
+        OVERLAP_START_SYNCH_PATTERN = re.compile(r'ovrl\d+')
+        OVERLAP_END_SYNCH_PATTERN = re.compile(r'ovrl\d+e')
+
+        def __init__(self, event_tag: str, event_element: etree.Element,
+                     overlap_utterances_index: Mapping[str, etree.Element]):
+            super().__init__(event_tag, event_element, overlap_utterances_index)
+            # The synch attribute is matched once: True if it starts an overlap, False if it ends one, None if invalid
+            self._anchor_synch_attribute = self._event_element.get('synch')
+            if self._anchor_synch_attribute is None:
+                self._is_overlap_start = None
+            elif self.OVERLAP_START_SYNCH_PATTERN.fullmatch(self._anchor_synch_attribute):
+                self._is_overlap_start = True
+            elif self.OVERLAP_END_SYNCH_PATTERN.fullmatch(self._anchor_synch_attribute):
+                self._is_overlap_start = False
+            else:
+                self._is_overlap_start = None
+
         def _get_event_type(self) -> UtteranceEventType:
             """ TODO - Function DOC """
 
@@ -376,46 +476,37 @@ class TEIParser(object):
         def _get_event_properties(self) -> [(str, str)]:
             """ TODO - Function DOC """
 
-            anchor_synch_attribute = self._event_element.get('synch')
-            if re.fullmatch(r'ovrl\d+', anchor_synch_attribute):
-                utterance_elements = TEIParser._get_elements_by_relative_xpath('tei:u', self._annotation_block_element)
-                overlap_utterance_elements = utterance_elements[1:]
-                for overlap_utterance_element in overlap_utterance_elements:
-                    anchor_element = overlap_utterance_element[0]
-                    overlap_utterance_anchor_id = anchor_element.get(TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX + 'id')
-                    if overlap_utterance_anchor_id == anchor_synch_attribute:
-                        event_properties = list()
-                        event_properties.append(('speaker_id', overlap_utterance_element.get('who')))
-                        event_properties.append(('text', self._get_overlap_utterance_text(overlap_utterance_element)))
-                        return event_properties
-                raise etree.ParserError('Anchor tag\'s synch attribute {} in main utterance does not match any anchor '
-                                        'tag IDs in overlap utterances.'.format(anchor_synch_attribute))
-            elif re.fullmatch(r'ovrl\d+e', anchor_synch_attribute):
-                return list()
+            self._check_anchor_synch_attribute()
+            if self._is_overlap_start:
+                overlap_utterance_element = self._overlap_utterances_index.get(self._anchor_synch_attribute)
+                if overlap_utterance_element is None:
+                    raise etree.ParserError('Anchor tag\'s synch attribute {} in main utterance does not match any '
+                                            'anchor tag IDs in overlap utterances.'.format(
+                                                self._anchor_synch_attribute))
+                event_properties = list()
+                event_properties.append(('speaker_id', overlap_utterance_element.get('who')))
+                event_properties.append(('text', self._get_overlap_utterance_text(overlap_utterance_element)))
+                return event_properties
             else:
-                raise etree.ParserError('Anchor tag synch attribute {} not valid.'.format(anchor_synch_attribute))
+                return list()
 
         def _get_event_words(self) -> [str]:
             """ TODO - Function DOC """
 
-            anchor_synch_attribute = self._event_element.get('synch')
-            if re.fullmatch(r'ovrl\d+', anchor_synch_attribute):
-                return super()._get_words_from_element_tail()
-            elif re.fullmatch(r'ovrl\d+e', anchor_synch_attribute):
-                return list()
-            else:
-                raise etree.ParserError('Anchor tag synch attribute {} not valid.'.format(anchor_synch_attribute))
+            self._check_anchor_synch_attribute()
+            return super()._get_words_from_element_tail() if self._is_overlap_start else list()
 
         def _get_non_event_words(self) -> [str]:
             """ TODO - Function DOC """
 
-            anchor_synch_attribute = self._event_element.get('synch')
-            if re.fullmatch(r'ovrl\d+', anchor_synch_attribute):
-                return list()
-            elif re.fullmatch(r'ovrl\d+e', anchor_synch_attribute):
-                return super()._get_words_from_element_tail()
-            else:
-                raise etree.ParserError('Anchor tag synch attribute {} not valid.'.format(anchor_synch_attribute))
+            self._check_anchor_synch_attribute()
+            return list() if self._is_overlap_start else super()._get_words_from_element_tail()
+
+        def _check_anchor_synch_attribute(self) -> None:
+            """ TODO - Function DOC """
+
+            if self._is_overlap_start is None:
+                raise etree.ParserError('Anchor tag synch attribute {} not valid.'.format(self._anchor_synch_attribute))
 
         def _get_overlap_utterance_text(self, overlap_utterance_element: etree.Element) -> str:
             """ TODO - Function DOC """
@@ -424,7 +515,7 @@ class TEIParser(object):
             first_anchor_element_tail = overlap_utterance_element[0].tail
             overlap_utterance_text.extend(super()._get_stripped_words_from_text(first_anchor_element_tail))
             for event_element in overlap_utterance_element[1:-1]:
-                parsed_event = TEIParser._parse_event(event_element, self._annotation_block_element)
+                parsed_event = TEIParser._parse_event(event_element, self._overlap_utterances_index)
                 overlap_utterance_text.extend(parsed_event.event_words)
                 overlap_utterance_text.extend(parsed_event.non_event_words)
             return ' '.join(overlap_utterance_text)
@@ -467,10 +558,21 @@ class TEIParser(object):
         'distinct': TypeAEventParser
     }
 
-    def __init__(self, tei_file: TEIFile):
+    ANNOTATION_BLOCK_TAG = TEI_NAMESPACE_ATTRIBUTE_PREFIX + 'annotationBlock'
+
+    _compiled_xpaths = dict()
+    BODY_TAG = TEI_NAMESPACE_ATTRIBUTE_PREFIX + 'body'
+
+    def __init__(self, tei_file: TEIFile, streaming: bool = False):
         self._tei_file = tei_file
-        self._tei_file_tree = etree.parse(tei_file.file_path)
-        self._root_tree = self._tei_file_tree.getroot()
+        self._streaming = streaming
+        if streaming:
+            # Only the header and the timeline, which precede the body, are kept in memory
+            self._tei_file_tree = None
+            self._root_tree = self._parse_until_body()
+        else:
+            self._tei_file_tree = etree.parse(tei_file.file_path)
+            self._root_tree = self._tei_file_tree.getroot()
 
     @property
     def tei_file(self) -> TEIFile:
@@ -478,6 +580,12 @@ class TEIParser(object):
 
         return self._tei_file
 
+    @property
+    def tree(self) -> etree.ElementTree:
+        """ The parsed document, or None when it is streamed. """
+
+        return self._tei_file_tree
+
     def parse_lang_usage(self) -> [Language]:
         """ TODO - Function DOC """
 
@@ -520,47 +628,75 @@ class TEIParser(object):
     def parse_body(self) -> [Utterance]:
         """ TODO - Function DOC """
 
-        annotation_block_elements = self._get_elements_by_root_xpath('tei:text/tei:body/tei:annotationBlock')
-        utterances = list()
-        for annotation_block_element in annotation_block_elements:
-            utterance = Utterance()
-            # Populate utterance with data from annotation block attributes
-            speaker_id = annotation_block_element.get('who')
-            utterance.speaker = self._tei_file.get_speaker_by_id(speaker_id)
-            start_time_id = annotation_block_element.get('start')
-            utterance.start_time = self._tei_file.get_time_interval_by_id(start_time_id).interval
-            end_time_id = annotation_block_element.get('end')
-            utterance.end_time = self._tei_file.get_time_interval_by_id(end_time_id).interval
-            # Populate utterance with data from main utterance element (the first utterance in the block)
-            utterance_elements = self._get_elements_by_relative_xpath('tei:u', annotation_block_element)
-            main_utterance_element = utterance_elements[0]
-            utterance.id = main_utterance_element.get('{}id'.format(TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX))
-            # Determine utterance language: if main utterance's second element is a <foreign> tag use its 'lang'
-            # attribute as language code otherwise language code it-IT is used
-            first_main_utterance_element = main_utterance_element[0]
-            if self._remove_prefix_from_tag(first_main_utterance_element.tag) == 'foreign':
-                event_elements_container = first_main_utterance_element
-                utterance.language = event_elements_container.get('{}lang'.format(
-                    TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX))
-            else:
-                utterance.language = self.tei_file.DEFAULT_LANGUAGE
-                event_elements_container = main_utterance_element
-            # First events container element is always a <note> tag
-            utterance_note_element = event_elements_container[0]
-            utterance.note = utterance_note_element.text.strip()
-            # Populate utterance words
-            for event_element in event_elements_container:
-                parsed_event = TEIParser._parse_event(event_element, annotation_block_element)
-                utterance.words.extend(self._get_utterance_word_for_parsed_event(parsed_event,
-                                                                                 [parsed_event.utterance_event]))
-            # Increment total and language's words counts
-            utterance_words_count = len(utterance.words)
-            self._tei_file.increment_words_counter(utterance_words_count)
-            self._tei_file.increment_language_words_counter(utterance.language, utterance_words_count)
-            # Populate text
-            utterance.text = ' '.join(list(utterance_word.word for utterance_word in utterance.words))
-            utterances.append(utterance)
-        return utterances
+        return list(self.iter_body())
+
+    def iter_body(self) -> Iterator[Utterance]:
+        """ Yields the utterance of each annotation block of the body, streaming the document if so configured. """
+
+        if not self._streaming:
+            annotation_block_elements = self._get_elements_by_root_xpath('tei:text/tei:body/tei:annotationBlock')
+            yield from map(self._parse_annotation_block, annotation_block_elements)
+            return
+        for _, annotation_block_element in etree.iterparse(self._tei_file.file_path, events=('end',),
+                                                           tag=self.ANNOTATION_BLOCK_TAG):
+            yield self._parse_annotation_block(annotation_block_element)
+            # Discard the block and the already parsed ones, which are still referenced by their parent
+            annotation_block_element.clear(keep_tail=True)
+            while annotation_block_element.getprevious() is not None:
+                del annotation_block_element.getparent()[0]
+
+    def _parse_annotation_block(self, annotation_block_element: etree.Element) -> Utterance:
+        """ TODO - Function DOC """
+
+        utterance = Utterance()
+        # Populate utterance with data from annotation block attributes
+        speaker_id = annotation_block_element.get('who')
+        utterance.speaker = self._tei_file.get_speaker_by_id(speaker_id)
+        start_time_id = annotation_block_element.get('start')
+        utterance.start_time = self._tei_file.get_absolute_time_by_id(start_time_id)
+        end_time_id = annotation_block_element.get('end')
+        utterance.end_time = self._tei_file.get_absolute_time_by_id(end_time_id)
+        # Populate utterance with data from main utterance element (the first utterance in the block)
+        utterance_elements = self._get_elements_by_relative_xpath('tei:u', annotation_block_element)
+        main_utterance_element = utterance_elements[0]
+        overlap_utterances_index = self._get_overlap_utterances_index(utterance_elements[1:])
+        utterance.id = main_utterance_element.get('{}id'.format(TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX))
+        # Determine utterance language: if main utterance's second element is a <foreign> tag use its 'lang'
+        # attribute as language code otherwise language code it-IT is used
+        first_main_utterance_element = main_utterance_element[0]
+        if self._remove_prefix_from_tag(first_main_utterance_element.tag) == 'foreign':
+            event_elements_container = first_main_utterance_element
+            utterance.language = event_elements_container.get('{}lang'.format(
+                TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX))
+        else:
+            utterance.language = self.tei_file.DEFAULT_LANGUAGE
+            event_elements_container = main_utterance_element
+        # First events container element is always a <note> tag
+        utterance_note_element = event_elements_container[0]
+        utterance.note = utterance_note_element.text.strip()
+        # Populate utterance words
+        for event_element in event_elements_container:
+            parsed_event = TEIParser._parse_event(event_element, overlap_utterances_index)
+            utterance.words.extend(self._get_utterance_word_for_parsed_event(parsed_event,
+                                                                             [parsed_event.utterance_event]))
+        # Increment total and language's words counts
+        utterance_words_count = len(utterance.words)
+        self._tei_file.increment_words_counter(utterance_words_count)
+        self._tei_file.increment_language_words_counter(utterance.language, utterance_words_count)
+        # Populate text
+        utterance.text = ' '.join(list(utterance_word.word for utterance_word in utterance.words))
+        return utterance
+
+    def _parse_until_body(self) -> etree.Element:
+        """ Parses the document up to the start of its body and returns the root of the partial tree. """
+
+        root_element = None
+        for _, element in etree.iterparse(self._tei_file.file_path, events=('start',)):
+            if root_element is None:
+                root_element = element
+            if element.tag == self.BODY_TAG:
+                break
+        return root_element
 
     def _parse_language_knowledge(self, person_element: etree.Element) -> [LanguageKnown]:
         """ TODO - Function DOC """
@@ -577,13 +713,34 @@ class TEIParser(object):
     def _get_elements_by_root_xpath(self, root_xpath: str) -> [etree.Element]:
         """ TODO - Function DOC """
 
-        return self._root_tree.xpath(root_xpath, namespaces=TEI.TEI_NAMESPACES)
+        return self._get_compiled_xpath(root_xpath)(self._root_tree)
 
     @staticmethod
     def _get_elements_by_relative_xpath(relative_xpath: str, element: etree.Element) -> [etree.Element]:
         """ TODO - Function DOC """
 
-        return element.xpath(relative_xpath, namespaces=TEI.TEI_NAMESPACES)
+        return TEIParser._get_compiled_xpath(relative_xpath)(element)
+
+    @staticmethod
+    def _get_compiled_xpath(xpath: str) -> etree.XPath:
+        """ Returns the compiled XPath expression of a path, compiling it only the first time it is requested. """
+
+        compiled_xpath = TEIParser._compiled_xpaths.get(xpath)
+        if compiled_xpath is None:
+            compiled_xpath = TEIParser._compiled_xpaths[xpath] = etree.XPath(xpath, namespaces=TEI.TEI_NAMESPACES)
+        return compiled_xpath
+
+    @staticmethod
+    def _get_overlap_utterances_index(overlap_utterance_elements: [etree.Element]) -> Mapping[str, etree.Element]:
+        """ Returns the overlap utterances of an annotation block by the id of their first anchor. """
+
+        overlap_utterances_index = dict()
+        for overlap_utterance_element in overlap_utterance_elements:
+            if len(overlap_utterance_element):
+                overlap_utterances_index.setdefault(
+                    overlap_utterance_element[0].get(TEIParser.XML_NAMESPACE_ATTRIBUTE_PREFIX + 'id'),
+                    overlap_utterance_element)
+        return overlap_utterances_index
 
     @staticmethod
     def _get_utterance_word_for_parsed_event(parsed_event: EventParser.ParsedEvent, word_events: [UtteranceEvent]) -> \
@@ -601,12 +758,13 @@ class TEIParser(object):
         return utterance_words
 
     @staticmethod
-    def _parse_event(event_element: etree.Element, annotation_block_element: etree.Element) -> EventParser.ParsedEvent:
+    def _parse_event(event_element: etree.Element,
+                     overlap_utterances_index: Mapping[str, etree.Element]) -> EventParser.ParsedEvent:
         """ TODO - Function DOC """
 
         event_tag = TEIParser._remove_prefix_from_tag(event_element.tag)
         event_parser_class = TEIParser.EVENT_PARSE_HANDLER_MAPPING.get(event_tag, TEIParser.DefaultEventParser)
-        event_parser = event_parser_class(event_tag, event_element, annotation_block_element)
+        event_parser = event_parser_class(event_tag, event_element, overlap_utterances_index)
         return event_parser.parse_event()
 
     @staticmethod
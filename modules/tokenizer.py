@@ -1,8 +1,11 @@
 """ TODO - Module DOC """
 
 import re
+import threading
 from abc import ABC, abstractmethod
-from typing import Mapping, Any
+from collections import OrderedDict
+from typing import Dict, Hashable, Mapping, Any, Optional, Sequence, Tuple, Type
+import numpy as np
 from num2words import num2words
 from modules import utilities
 from modules.compiled.canonical_transcription_pb2 import CanonicalToken
@@ -36,16 +39,179 @@ class CanonicalTokenizer(ABC):
         pass
 
 
+TokenSkeleton = Tuple[Tuple[str, int], ...]
+TokenizationKey = Tuple[str, Hashable]
+
+
+class TokenizationCache:
+    """Thread safe LRU cache of the tokens a word is split into, without their timestamps.
+
+    Words are keyed together with the tokenizer class, the language and the tokenizer configuration that split them,
+    so that a single cache is shared by all the tokenizers of the process, see get_tokenization_cache.
+
+    """
+
+    def __init__(self, maximum_entries: int):
+        self._maximum_entries = maximum_entries
+        self._entries: OrderedDict[TokenizationKey, TokenSkeleton] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def hits(self) -> int:
+        """ Number of words found in the cache. """
+
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """ Number of words not found in the cache. """
+
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        """ Number of least recently used words removed to keep the cache within its maximum size. """
+
+        return self._evictions
+
+    @property
+    def hit_rate(self) -> float:
+        """ Fraction of the lookups that were found in the cache. """
+
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+
+    def get(self, tokenization_key: TokenizationKey) -> Optional[TokenSkeleton]:
+        """ Returns the tokens of a word, None if it is not in the cache. """
+
+        with self._lock:
+            token_skeleton = self._entries.get(tokenization_key)
+            if token_skeleton is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(tokenization_key)
+            return token_skeleton
+
+    def put(self, tokenization_key: TokenizationKey, token_skeleton: TokenSkeleton) -> None:
+        """ Stores the tokens of a word, evicting the least recently used word if the cache is full. """
+
+        if self._maximum_entries <= 0:
+            return
+        with self._lock:
+            self._entries[tokenization_key] = token_skeleton
+            if len(self._entries) > self._maximum_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_statistics(self) -> Mapping[str, Any]:
+        """ Returns the counters of the cache, useful to tune its maximum number of entries. """
+
+        return {
+            'entries': len(self._entries),
+            'maximum_entries': self._maximum_entries,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'hit_rate': self.hit_rate
+        }
+
+
+class TokenizedBatch:
+    """Tokens of a batch of words, stored column-wise.
+
+    The tokens of the i-th word of the batch are the ones between offsets[i] and offsets[i + 1]: words that have no
+    tokens, like the empty ones, have an empty range. Token times are the ones of the word they come from.
+
+    """
+
+    def __init__(self, words: np.ndarray, types: np.ndarray, start_times: np.ndarray, end_times: np.ndarray,
+                 offsets: np.ndarray):
+        self._words = words
+        self._types = types
+        self._start_times = start_times
+        self._end_times = end_times
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def words(self) -> np.ndarray:
+        """ The object array of the token strings. """
+
+        return self._words
+
+    @property
+    def types(self) -> np.ndarray:
+        """ The int8 array of the token types, values of CanonicalToken.CanonicalTokenType. """
+
+        return self._types
+
+    @property
+    def start_times(self) -> np.ndarray:
+        """ The float64 array of the token start times. """
+
+        return self._start_times
+
+    @property
+    def end_times(self) -> np.ndarray:
+        """ The float64 array of the token end times. """
+
+        return self._end_times
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """ The int64 array of the offsets of the tokens of each word, with one more element than the batch words. """
+
+        return self._offsets
+
+    def get_tokens(self, word_index: int) -> [CanonicalToken]:
+        """ Returns the tokens of a word of the batch as CanonicalTokenizer.tokenize does, None if it has none. """
+
+        token_start, token_end = self._offsets[word_index], self._offsets[word_index + 1]
+        if token_start == token_end:
+            return None
+        return [CanonicalToken(word=self._words[token_index], start_time=float(self._start_times[token_index]),
+                               end_time=float(self._end_times[token_index]), type=int(self._types[token_index]))
+                for token_index in range(token_start, token_end)]
+
+
 class DefaultCanonicalTokenizer(CanonicalTokenizer):
     """ TODO - Class DOC """
 
     SPECIAL_CHARACTERS = '"#$%()/<=>@[\\]^_`{|}~'
     ALLOWED_PUNCTUATION = '!,-.:;?'
-
-    def __init__(self, language_code: str, tokenizer_configuration: Mapping[str, Any] = None):
+    # The backslash of SPECIAL_CHARACTERS only escapes the closing bracket in the character class it used to build
+    SPECIAL_CHARACTERS_TABLE = str.maketrans('', '', SPECIAL_CHARACTERS.replace('\\', ''))
+    APOSTROPHE_REGEX = re.compile(r'([\w]+[\'])([\w]+)')
+    DEFAULT_CACHE_MAXIMUM_ENTRIES = 10000
+    PRONUNCIATION_TYPE = CanonicalToken.CanonicalTokenType.PRONUNCIATION
+    PUNCTUATION_TYPE = CanonicalToken.CanonicalTokenType.PUNCTUATION
+
+    def __init__(self, language_code: str, tokenizer_configuration: Mapping[str, Any] = None,
+                 tokenization_cache: TokenizationCache = None):
         super().__init__(language_code)
         self._tokenizer_config = tokenizer_configuration if tokenizer_configuration else \
             utilities.load_configuration_section(ConfigSections.TOKENIZER)
+        self._lowercase = self._is_tokenizer_config_enabled(Tokenizer.LOWERCASE)
+        self._numbers_to_word = self._is_tokenizer_config_enabled(Tokenizer.NUMBERS_TO_WORD)
+        self._split_apostrophes = self._is_tokenizer_config_enabled(Tokenizer.SPLIT_APOSTROPHES)
+        self._cache = tokenization_cache if tokenization_cache is not None else \
+            get_tokenization_cache(self._tokenizer_config)
+        # Words are cached together with everything that affects how they are split, except the size of the cache
+        self._cache_key = (type(self), language_code, repr(sorted(
+            (config_key, config_value) for config_key, config_value in self._tokenizer_config.items()
+            if config_key != Tokenizer.CACHE_MAXIMUM_ENTRIES)))
+
+    @property
+    def cache(self) -> TokenizationCache:
+        """ The cache of the words already tokenized, whose statistics can be used to tune its size. """
+
+        return self._cache
 
     def tokenize(self, word: str, start_time: float = 0.0, end_time: float = 0.0) -> [CanonicalToken]:
         """ TODO - Function DOC """
@@ -54,100 +220,188 @@ class DefaultCanonicalTokenizer(CanonicalTokenizer):
         if not word:
             return None
 
+        return [CanonicalToken(word=token_word, start_time=start_time, end_time=end_time, type=token_type)
+                for token_word, token_type in self._get_cached_token_skeleton(word)]
+
+    def tokenize_batch(self, words: Sequence[str], start_times: Sequence[float] = None,
+                       end_times: Sequence[float] = None) -> TokenizedBatch:
+        """Tokenizes a batch of words at once.
+
+        Args:
+            words (Sequence[str]):
+                The words to tokenize.
+            start_times (Sequence[float]):
+                The start times of the words, parallel to them. All zeros if not given.
+            end_times (Sequence[float]):
+                The end times of the words, parallel to them. All zeros if not given.
+
+        Returns:
+            TokenizedBatch:
+                The tokens of all the words, with the offsets of the tokens of each word.
+
+        """
+
+        token_skeletons = [self._get_cached_token_skeleton(word) if word else () for word in words]
+        tokens_counts = np.fromiter((len(token_skeleton) for token_skeleton in token_skeletons), dtype=np.int64,
+                                    count=len(token_skeletons))
+        offsets = np.zeros(len(token_skeletons) + 1, dtype=np.int64)
+        np.cumsum(tokens_counts, out=offsets[1:])
+        token_words = np.empty(offsets[-1], dtype=object)
+        token_words[:] = [token_word for token_skeleton in token_skeletons for token_word, _ in token_skeleton]
+        token_types = np.fromiter((token_type for token_skeleton in token_skeletons
+                                   for _, token_type in token_skeleton), dtype=np.int8, count=offsets[-1])
+        return TokenizedBatch(token_words, token_types, self._get_batch_times(start_times, tokens_counts),
+                              self._get_batch_times(end_times, tokens_counts), offsets)
+
+    @staticmethod
+    def _get_batch_times(times: Optional[Sequence[float]], tokens_counts: np.ndarray) -> np.ndarray:
+        """ Repeats the times of the words of a batch for each of their tokens. """
+
+        if times is None:
+            return np.zeros(tokens_counts.sum(), dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)
+        if len(times) != len(tokens_counts):
+            raise ValueError('Expected {} times, got {}.'.format(len(tokens_counts), len(times)))
+        return np.repeat(times, tokens_counts)
+
+    def _get_cached_token_skeleton(self, word: str) -> TokenSkeleton:
+        """ Returns the token skeleton of a word from the cache, computing and caching it if it is missing. """
+
+        tokenization_key = (word, self._cache_key)
+        token_skeleton = self._cache.get(tokenization_key)
+        if token_skeleton is None:
+            token_skeleton = self._get_token_skeleton(word)
+            self._cache.put(tokenization_key, token_skeleton)
+        return token_skeleton
+
+    def _get_token_skeleton(self, word: str) -> TokenSkeleton:
+        """ Returns the words and types of the tokens of a word, which are the same for all its occurrences. """
+
         # Clean special characters
-        cleaned_word = re.sub('[' + self.SPECIAL_CHARACTERS + ']', '', word)
+        cleaned_word = word.translate(self.SPECIAL_CHARACTERS_TABLE)
 
         # Separate punctuation and pronunciation
         last_character = cleaned_word[-1]
         if cleaned_word in self.ALLOWED_PUNCTUATION:
-            return [super()._get_canonical_punctuation_word(cleaned_word, start_time, end_time)]
+            return (cleaned_word, self.PUNCTUATION_TYPE),
         elif last_character in self.ALLOWED_PUNCTUATION:
-            pronunciation_word = super()._get_canonical_pronunciation_word(cleaned_word[:-1], start_time, end_time)
-            punctuation_word = super()._get_canonical_punctuation_word(last_character, start_time, end_time)
-            return self._tokenize_pronunciation_word(pronunciation_word) + [punctuation_word]
+            return self._tokenize_pronunciation_word(cleaned_word[:-1]) + ((last_character, self.PUNCTUATION_TYPE),)
         else:
-            pronunciation_word = super()._get_canonical_pronunciation_word(cleaned_word, start_time, end_time)
-            return self._tokenize_pronunciation_word(pronunciation_word)
+            return self._tokenize_pronunciation_word(cleaned_word)
 
     def _is_tokenizer_config_enabled(self, config_key: str) -> bool:
         """ TODO - Function DOC """
 
         return self._tokenizer_config[config_key]
 
-    def _tokenize_pronunciation_word(self, pronunciation_word: CanonicalToken) -> [CanonicalToken]:
-        """ TODO - Function DOC """
+    def _tokenize_pronunciation_word(self, pronunciation_word: str) -> TokenSkeleton:
+        """ Applies all the enabled stages to the word in one pass. """
 
-        tokens = [pronunciation_word]
-
-        if self._is_tokenizer_config_enabled(Tokenizer.LOWERCASE):
-            processed_tokens = list()
-            for token in tokens:
-                processed_word = token.word.lower()
-                processed_token = CanonicalToken(word=processed_word, start_time=token.start_time,
-                                                 end_time=token.end_time, type=token.type)
-                processed_tokens.append(processed_token)
-            tokens = processed_tokens
-
-        if self._is_tokenizer_config_enabled(Tokenizer.NUMBERS_TO_WORD):
-            processed_tokens = list()
-            for token in tokens:
-                if token.word.isdigit():
-                    processed_words = num2words(int(token.word), lang=self._language_code).split()
-                    for processed_word in processed_words:
-                        processed_token = CanonicalToken(word=processed_word, start_time=token.start_time,
-                                                         end_time=token.end_time, type=token.type)
-                        processed_tokens.append(processed_token)
-                else:
-                    processed_tokens.append(token)
-            tokens = processed_tokens
-
-        if self._is_tokenizer_config_enabled(Tokenizer.SPLIT_APOSTROPHES):
-            processed_tokens = list()
-            for token in tokens:
-                regex_search_result = re.search(r'([\w]+[\'])([\w]+)', token.word)
-                if regex_search_result:
-                    processed_words = regex_search_result.groups()
-                    for processed_word in processed_words:
-                        processed_token = CanonicalToken(word=processed_word, start_time=token.start_time,
-                                                         end_time=token.end_time, type=token.type)
-                        processed_tokens.append(processed_token)
-                else:
-                    processed_tokens.append(token)
-            tokens = processed_tokens
-
-        if self._is_tokenizer_config_enabled(Tokenizer.EXPAND_CONTRACTED_WORDS):
-            processed_tokens = list()
-            for token in tokens:
-                # TODO: Expand contracted words
-                processed_tokens.append(token)
-            tokens = processed_tokens
-
-        if self._is_tokenizer_config_enabled(Tokenizer.EXPAND_COMPOUND_WORDS):
-            processed_tokens = list()
-            for token in tokens:
-                # TODO: Expand compound words
-                processed_tokens.append(token)
-            tokens = processed_tokens
-
-        if self._is_tokenizer_config_enabled(Tokenizer.MULTI_SPELLED_WORDS):
-            processed_tokens = list()
-            for token in tokens:
-                # TODO: Expand multi spelled words
-                processed_tokens.append(token)
-            tokens = processed_tokens
-
-        return tokens
+        if self._lowercase:
+            pronunciation_word = pronunciation_word.lower()
+
+        if self._numbers_to_word and pronunciation_word.isdigit():
+            words = num2words(int(pronunciation_word), lang=self._language_code).split()
+        else:
+            words = [pronunciation_word]
+
+        tokens = list()
+        for word in words:
+            regex_search_result = self.APOSTROPHE_REGEX.search(word) if self._split_apostrophes else None
+            if regex_search_result:
+                tokens.extend((split_word, self.PRONUNCIATION_TYPE) for split_word in regex_search_result.groups())
+            else:
+                tokens.append((word, self.PRONUNCIATION_TYPE))
+
+        # TODO: Expand contracted words, compound words and multi spelled words. Until then, their stages leave the
+        # tokens unchanged whether EXPAND_CONTRACTED_WORDS, EXPAND_COMPOUND_WORDS and MULTI_SPELLED_WORDS are enabled
+        return tuple(tokens)
 
 
 class TEICanonicalTokenizer(DefaultCanonicalTokenizer):
     TYPE_B_EVENT_MARKERS = ['[vocal_event]', '[incident_event]', '[gap_event]']
+    TYPE_B_EVENT_TYPES = {
+        marker: CanonicalToken.CanonicalTokenType.DESCRIPTOR.values_by_name[marker.strip('[]').upper()].index
+        for marker in TYPE_B_EVENT_MARKERS
+    }
 
-    def tokenize(self, word: str, start_time: float = 0.0, end_time: float = 0.0) -> [CanonicalToken]:
+    def _get_token_skeleton(self, word: str) -> TokenSkeleton:
         """ TODO - Function DOC """
 
-        if word in TEICanonicalTokenizer.TYPE_B_EVENT_MARKERS:
-            canonical_word_type_name = re.sub(r'[\[\]]', '', word).upper()
-            canonical_word_type = CanonicalToken.CanonicalTokenType.DESCRIPTOR.values_by_name[canonical_word_type_name]
-            return [CanonicalToken(start_time=start_time, end_time=end_time, type=canonical_word_type.index)]
+        canonical_word_type = TEICanonicalTokenizer.TYPE_B_EVENT_TYPES.get(word)
+        if canonical_word_type is not None:
+            return ('', canonical_word_type),
         else:
-            return super().tokenize(word, start_time, end_time)
+            return super()._get_token_skeleton(word)
+
+
+class CanonicalTokenizerRegistry:
+    """Pool of tokenizers shared by all the words of a canonicalization run.
+
+    Tokenizers are created once per tokenizer class, language code and tokenizer configuration. They don't change
+    after their construction, so the same instance can be used by several threads at once. All of them share the
+    tokenization cache of the registry, which is the one of the process unless given, so that words tokenized in a
+    run are found by the following ones. The cache of the process is sized by the configuration of the first tokenizer
+    that needs it.
+
+    """
+
+    def __init__(self, tokenization_cache: TokenizationCache = None):
+        self._tokenizers: Dict[Tuple[Hashable, ...], CanonicalTokenizer] = dict()
+        self._lock = threading.Lock()
+        self._tokenization_cache = tokenization_cache
+
+    @property
+    def tokenization_cache(self) -> TokenizationCache:
+        """ The cache shared by the tokenizers of the registry. """
+
+        return self._tokenization_cache if self._tokenization_cache is not None else get_tokenization_cache()
+
+    def get_tokenizer(self, tokenizer_class: Type[DefaultCanonicalTokenizer], language_code: str,
+                      tokenizer_configuration: Mapping[str, Any] = None) -> DefaultCanonicalTokenizer:
+        """ Returns the tokenizer for the given class, language and configuration, creating it the first time. """
+
+        if not tokenizer_configuration:
+            tokenizer_configuration = utilities.load_configuration_section(ConfigSections.TOKENIZER)
+        tokenizer_key = (tokenizer_class, language_code, repr(sorted(tokenizer_configuration.items())))
+        tokenizer = self._tokenizers.get(tokenizer_key)
+        if tokenizer is None:
+            with self._lock:
+                tokenizer = self._tokenizers.get(tokenizer_key)
+                if tokenizer is None:
+                    if self._tokenization_cache is None:
+                        self._tokenization_cache = get_tokenization_cache(tokenizer_configuration)
+                    tokenizer = tokenizer_class(language_code, tokenizer_configuration, self._tokenization_cache)
+                    self._tokenizers[tokenizer_key] = tokenizer
+        return tokenizer
+
+    def __len__(self) -> int:
+        return len(self._tokenizers)
+
+
+_tokenization_cache = None
+_tokenization_cache_lock = threading.Lock()
+
+
+def get_tokenization_cache(tokenizer_configuration: Mapping[str, Any] = None) -> TokenizationCache:
+    """Returns the tokenization cache of the process, creating it the first time.
+
+    Args:
+        tokenizer_configuration (Mapping[str, Any]):
+            The configuration whose cache maximum entries size the cache when it is created, the default size if it
+            has none. The Tokenizer section of the configuration file is read only when it is not given.
+
+    Returns:
+        TokenizationCache:
+            The cache shared by all the tokenizers of the process.
+
+    """
+
+    global _tokenization_cache
+    with _tokenization_cache_lock:
+        if _tokenization_cache is None:
+            if not tokenizer_configuration:
+                tokenizer_configuration = utilities.load_configuration_section(ConfigSections.TOKENIZER)
+            _tokenization_cache = TokenizationCache(tokenizer_configuration.get(
+                Tokenizer.CACHE_MAXIMUM_ENTRIES, DefaultCanonicalTokenizer.DEFAULT_CACHE_MAXIMUM_ENTRIES))
+        return _tokenization_cache
@@ -5,12 +5,14 @@ services configuration and file system access.
 
 """
 
+from __future__ import annotations
 import ast
 import configparser
 import csv
+import os
 from collections import defaultdict
 from pathlib import Path
-from typing import AnyStr, Iterable, Mapping, Any
+from typing import AnyStr, Iterable, Iterator, Mapping, Optional, Tuple, Any
 from google.protobuf import json_format
 from modules.constants import Paths, Google, Amazon, ConfigSections
 from modules.compiled.canonical_transcription_pb2 import CanonicalTranscription
@@ -222,24 +224,111 @@ def load_configuration_file() -> configparser.ConfigParser:
 def load_configuration_section(section_name: str) -> Mapping[str, Any]:
     """Loads a section of the configuration file specified in modules.constants.Paths.MAIN_CONFIG_FILE.
 
+    The file is parsed once per process and again only when it changes, see ConfigurationRegistry.
+
     Args:
         section_name (str):
             The name of the section to load.
 
     Returns:
-        TODO - Function DOC
+        Mapping[str, Any]:
+            A read-only view of the options of the section, shared by all the callers.
 
     """
 
-    config_file = load_configuration_file()
-    file_section = dict()
-    for option in config_file.options(section_name):
-        option_value = config_file.get(section_name, option)
+    return _configuration_registry.get_section(section_name)
+
+
+def get_configuration_registry() -> ConfigurationRegistry:
+    """ Returns the registry of the process that caches the configuration file sections. """
+
+    return _configuration_registry
+
+
+class FrozenSection(Mapping):
+    """ Read-only mapping of the options of a configuration section. Unlike a mapping proxy, it can be pickled. """
+
+    def __init__(self, options: Mapping[str, Any]):
+        self._options = dict(options)
+
+    def __getitem__(self, option: str) -> Any:
+        return self._options[option]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._options)
+
+    def __len__(self) -> int:
+        return len(self._options)
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(type(self).__name__, self._options)
+
+
+class ConfigurationRegistry:
+    """Cache of the parsed sections of a configuration file.
+
+    The file is read and its options evaluated only when it is first requested or when its path, modification time
+    or size change. Sections are handed out as frozen views shared by all the callers.
+
+    """
+
+    def __init__(self, config_file_path: Path):
+        self._config_file_path = config_file_path
+        self._file_stamp = None
+        self._sections = dict()
+        self._disk_reads = 0
+        self._saved_reads = 0
+
+    @property
+    def disk_reads(self) -> int:
+        """ How many times the configuration file was read and parsed. """
+
+        return self._disk_reads
+
+    @property
+    def saved_reads(self) -> int:
+        """ How many sections were served from the cache instead of reading the configuration file. """
+
+        return self._saved_reads
+
+    def get_section(self, section_name: str) -> Mapping[str, Any]:
+        """ Returns the frozen view of a section, raising configparser.NoSectionError if the file doesn't have it. """
+
+        file_stamp = self._get_file_stamp()
+        if file_stamp is None or file_stamp != self._file_stamp:
+            self._load_sections()
+            self._file_stamp = file_stamp
+        else:
+            self._saved_reads += 1
+        if section_name not in self._sections:
+            raise configparser.NoSectionError(section_name)
+        return self._sections[section_name]
+
+    def _get_file_stamp(self) -> Optional[Tuple[str, int, int]]:
+        """ Returns the absolute path, modification time and size of the file, or None if it doesn't exist. """
+
+        config_file_path = os.path.abspath(self._config_file_path)
         try:
-            file_section[option] = ast.literal_eval(option_value)
-        except (SyntaxError, ValueError):
-            file_section[option] = option_value
-    return file_section
+            file_stat = os.stat(config_file_path)
+        except OSError:
+            return None
+        return config_file_path, file_stat.st_mtime_ns, file_stat.st_size
+
+    def _load_sections(self) -> None:
+        """ Reads the configuration file and evaluates the options of all its sections. """
+
+        config_file = load_configuration_file()
+        self._disk_reads += 1
+        self._sections = dict()
+        for section_name in config_file.sections():
+            file_section = dict()
+            for option in config_file.options(section_name):
+                option_value = config_file.get(section_name, option)
+                try:
+                    file_section[option] = ast.literal_eval(option_value)
+                except (SyntaxError, ValueError):
+                    file_section[option] = option_value
+            self._sections[section_name] = FrozenSection(file_section)
 
 
 def read_local_file(local_file_path: str, mode: str = 'r') -> AnyStr:
@@ -279,3 +368,6 @@ def write_local_csv_file(local_csv_file_path: str, csv_header: Iterable, csv_row
         writer = csv.writer(output_csv_file)
         writer.writerow(csv_header)
         writer.writerows(csv_rows)
+
+
+_configuration_registry = ConfigurationRegistry(Paths.MAIN_CONFIG_FILE)
@@ -0,0 +1,16 @@
+""" TODO - Module DOC """
+
+import numpy as np
+from modules import alignment
+
+if __name__ == '__main__':
+    reference = 'il gatto è sopra il tavolo'.split()
+    hypothesis = 'il gatto sopra al tavolo rosso'.split()
+    vocabulary = {word: index for index, word in enumerate(dict.fromkeys(reference + hypothesis))}
+    reference_ids = np.array([vocabulary[word] for word in reference], dtype=np.int32)
+    hypothesis_ids = np.array([vocabulary[word] for word in hypothesis], dtype=np.int32)
+    backpointers, cost = alignment.compile_backpointers(reference_ids, hypothesis_ids)
+    edit_script = alignment.backtrace_backpointers(backpointers)
+    print('Cost: {}'.format(cost))
+    print('Edit script: {}'.format(edit_script.tolist()))
+    print('Operations counts: {}'.format(alignment.count_operations(reference_ids, hypothesis_ids).tolist()))
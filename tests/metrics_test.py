@@ -1,16 +1,20 @@
 """ TODO - Module DOC """
 
 from modules import utilities
+from modules.alignment import Vocabulary
 from modules.metrics import GoogleSTTMetrics, AWSTranscribeMetrics
 
 if __name__ == '__main__':
     file_names = ['FCINI002a', 'FCINI002b', 'FCINI003a', 'FCINI003b', 'FCINI004a', 'FCINI004b', 'FCINI005a', 'FCINI005b']
     paths = utilities.get_paths_for_file_names(file_names)
+    vocabulary = Vocabulary()
     print('---------------------------------------------------------------------------------------------------------')
     print('Custom metrics for Google STT')
     print('Computing...')
-    GoogleSTTMetrics(paths['tei_canonical_file_paths'], paths['google_canonical_file_paths']).metrics()
+    GoogleSTTMetrics(paths['tei_canonical_file_paths'], paths['google_canonical_file_paths'],
+                     vocabulary=vocabulary).metrics()
     print('---------------------------------------------------------------------------------------------------------')
     print('Computing...')
     print('Custom metrics for AWS Transcribe')
-    AWSTranscribeMetrics(paths['tei_canonical_file_paths'], paths['aws_canonical_file_paths']).metrics()
+    AWSTranscribeMetrics(paths['tei_canonical_file_paths'], paths['aws_canonical_file_paths'],
+                         vocabulary=vocabulary).metrics()
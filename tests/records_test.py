@@ -0,0 +1,14 @@
+""" TODO - Module DOC """
+
+from modules import utilities
+from modules.constants import ConfigSections, Paths
+from modules.metrics import MetricsCalculator
+from modules.records import AlignmentRecords
+
+if __name__ == '__main__':
+    report_output_path = utilities.load_configuration_section(ConfigSections.GOOGLE_STT)[Paths.REPORT_OUTPUT_PATH]
+    alignment_records = AlignmentRecords.load('{}/Corpus_Records.npz'.format(report_output_path))
+    print('Loaded {} aligned operations'.format(len(alignment_records)))
+    for (language, audio_note), metrics in MetricsCalculator.compute_records_metrics(
+            alignment_records, ('language', 'audio_note')).items():
+        print('{} {}: WER {:.4f}'.format(language, audio_note, metrics['wer']))